@@ -1,11 +1,90 @@
-import os
+import time
+import queue
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 import logging
+from aadhaar_analytics.ai import response_cache, prompt_compaction
+from aadhaar_analytics.utils import constants
+from aadhaar_analytics.utils.ratelimit import TokenBucket
+
+# HTTP statuses worth retrying (rate limited, timed out or server side)
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+def is_retryable(error):
+    """API errors with a transient status, and transport errors (timeouts, resets)."""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRY_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+class ClientRegistry:
+    """
+    Process-wide genai clients keyed by API key and endpoint, so every
+    GeminiService for the same key shares one client and its kept-alive
+    connections. Holds at most `maxsize` clients; clients unused for `idle`
+    seconds (and the least recently used beyond maxsize) are dropped. They are
+    not closed here, as services and streams may still be using them: a client
+    closes its connections when the last of them lets go (genai.Client.__del__).
+    """
+    def __init__(self, maxsize=None, idle=None):
+        self.maxsize = constants.AI_CLIENT_POOL_SIZE if maxsize is None else maxsize
+        self.idle = constants.AI_CLIENT_IDLE if idle is None else idle
+        self._clients = OrderedDict()  # key -> (client, last used)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_key, base_url, timeout):
+        # The key itself is not kept as a dictionary key
+        return (hashlib.sha256(api_key.encode("utf-8")).hexdigest(), base_url, timeout)
+
+    def get(self, api_key, base_url=None, timeout=None):
+        """The shared client for these settings, created on first use."""
+        key = self._key(api_key, base_url, timeout)
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            if key in self._clients:
+                client = self._clients.pop(key)[0]
+            else:
+                http_options = types.HttpOptions(
+                    base_url=base_url,
+                    timeout=int(timeout * 1000) if timeout else None,
+                    # Keep idle connections open between interactions
+                    client_args={"limits": httpx.Limits(keepalive_expiry=self.idle)}
+                )
+                client = genai.Client(api_key=api_key, http_options=http_options)
+            self._clients[key] = (client, now)
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+        return client
+
+    def _evict(self, now):
+        for k in [k for k, (_, used) in self._clients.items() if now - used > self.idle]:
+            del self._clients[k]
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+CLIENTS = ClientRegistry()
 
 class GeminiService:
-    def __init__(self, api_key):
+    def __init__(self, api_key, model=None, cache=None, base_url=None, timeout=None):
         self.api_key = api_key
+        self.model = model or constants.GEMINI_MODEL
+        # Answers are reused for identical (model, prompt) pairs
+        self.cache = cache if cache is not None else response_cache.default_cache()
+        # base_url points the client at another endpoint (e.g. a local stub server)
+        self.base_url = base_url or constants.GEMINI_BASE_URL
+        self.timeout = constants.AI_TIMEOUT if timeout is None else timeout
         self.client = None
         self.setup()
 
@@ -13,24 +92,127 @@ class GeminiService:
         if not self.api_key:
             return
         try:
-            self.client = genai.Client(api_key=self.api_key)
+            # Shared with every other service using the same key (see ClientRegistry)
+            self.client = CLIENTS.get(self.api_key, self.base_url, self.timeout)
         except Exception as e:
             logging.error(f"Failed to setup Gemini: {e}")
 
-    def generate_response(self, prompt):
+    def _generate(self, prompt, bucket=None):
+        """
+        One model call with up to AI_RETRIES retries (exponential backoff with
+        jitter) on transient errors; each attempt first takes a token from
+        `bucket` if given. Raises the last error.
+        """
+        for attempt in range(constants.AI_RETRIES + 1):
+            if bucket:
+                bucket.acquire()
+            try:
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    contents=prompt
+                )
+                return response.text
+            except Exception as e:
+                if attempt == constants.AI_RETRIES or not is_retryable(e):
+                    raise
+                delay = constants.AI_BACKOFF * 2 ** attempt * (1 + random.random())
+                logging.warning(f"Gemini call failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def generate_response(self, prompt, bucket=None):
+        cached = self.cache.get(self.model, prompt) if self.cache else None
+        if cached is not None:
+            return cached
+        if constants.AI_OFFLINE:
+            return "📴 AI is in offline mode and has no cached answer for this view yet."
         if not self.client:
             return "⚠️ Gemini API Key not provided or invalid. Please check the sidebar."
         
         try:
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            return response.text
+            text = self._generate(prompt, bucket)
+            if self.cache and text:
+                self.cache.put(self.model, prompt, text)
+            return text
         except Exception as e:
             return f"❌ Error generating AI response: {str(e)}"
 
+    def stream_response(self, prompt, budget=None, fallback=None):
+        """
+        Streaming generate_response: yields the answer so far as chunks
+        arrive. If it is not complete within `budget` seconds (default
+        AI_LATENCY_BUDGET) the `fallback` text is yielded instead and the
+        call finishes in the background, caching its answer for next time.
+        """
+        budget = constants.AI_LATENCY_BUDGET if budget is None else budget
+        cached = self.cache.get(self.model, prompt) if self.cache else None
+        if cached is not None:
+            yield cached
+            return
+        if constants.AI_OFFLINE:
+            yield self._fallback(fallback, "📴 AI is in offline mode and has no cached answer for this view yet.")
+            return
+        if not self.client:
+            yield self._fallback(fallback, "⚠️ Gemini API Key not provided or invalid. Please check the sidebar.")
+            return
+
+        updates = queue.Queue()
+        threading.Thread(target=self._stream, args=(prompt, updates), name="gemini-stream", daemon=True).start()
+        deadline = time.monotonic() + budget
+        while True:
+            try:
+                item = updates.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                yield self._fallback(fallback, f"⏱️ The AI answer is taking longer than {budget:g}s; it will be shown next time.")
+                return
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                yield self._fallback(fallback, f"❌ Error generating AI response: {item}")
+                return
+            yield item
+
+    def _stream(self, prompt, updates):
+        """Puts the accumulated text after every chunk, then None (or the error) on `updates`."""
+        for attempt in range(constants.AI_RETRIES + 1):
+            text = ""
+            try:
+                for chunk in self.client.models.generate_content_stream(model=self.model, contents=prompt):
+                    text += chunk.text or ""
+                    updates.put(text)
+                break
+            except Exception as e:
+                # Only retry before anything has been shown
+                if text or attempt == constants.AI_RETRIES or not is_retryable(e):
+                    updates.put(e)
+                    return
+                time.sleep(constants.AI_BACKOFF * 2 ** attempt * (1 + random.random()))
+        if self.cache and text:
+            self.cache.put(self.model, prompt, text)
+        updates.put(None)
+
+    @staticmethod
+    def _fallback(fallback, note):
+        return f"{fallback}\n\n_{note}_" if fallback else note
+
+    def generate_batch(self, prompts, concurrency=None, rate=None):
+        """
+        Answers many prompts at once on a thread pool of `concurrency` calls
+        (default AI_CONCURRENCY), starting at most `rate` calls per second
+        (default AI_RATE; retries included). Cached prompts skip the limits.
+        Returns the responses in prompt order.
+        """
+        concurrency = constants.AI_CONCURRENCY if concurrency is None else concurrency
+        bucket = TokenBucket(constants.AI_RATE if rate is None else rate)
+        if not prompts:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(prompts)))) as pool:
+            return list(pool.map(lambda p: self.generate_response(p, bucket), prompts))
+
     def explain_kpis(self, kpis, state_filter):
+        return self.generate_response(self.kpi_prompt(kpis, state_filter))
+
+    @staticmethod
+    def kpi_prompt(kpis, state_filter):
         prompt = f"""
         You are the **Chief Data Strategy Officer for the Government of India (UIDAI)**.
         
@@ -50,18 +232,24 @@ class GeminiService:
         
         **Output**: Provide a sharp, executive-level insight block (2-3 sentences max) focusing on the *implications* of these numbers, not just restating them. Use bolding for emphasis.
         """
-        return self.generate_response(prompt)
+        return prompt
+
+    def analyze_trends(self, trend_df, context="Enrolment", budget=None):
+        return self.generate_response(self.trend_prompt(trend_df, context, budget))
 
-    def analyze_trends(self, trend_df, context="Enrolment"):
-        # Summarize data for prompt to save tokens
-        summary = trend_df.to_csv(index=False)
+    @staticmethod
+    def trend_prompt(trend_df, context="Enrolment", budget=None):
+        # Summarize data for prompt to save tokens: short histories go in as
+        # CSV, longer ones are compacted to about `budget` tokens
+        summary, report = prompt_compaction.compact_trend(trend_df, budget)
+        label = "Compacted" if report["compacted"] else "CSV"
         
         prompt = f"""
         You are a **Special Investigator for Demographic Anomalies**.
         
         **Context**: You are analyzing **{context}** trends over time to detect hidden societal patterns.
         
-        **Data Stream (CSV)**:
+        **Data Stream ({label})**:
         {summary}
         
         **Investigative Tasks**:
@@ -74,12 +262,15 @@ class GeminiService:
         - **⚠️ Critical Anomaly**: Any data point that looks suspicious or broken.
         - **🔮 Strategic Forecast**: One sentence prediction for the next quarter.
         """
-        return self.generate_response(prompt)
+        return prompt
 
     def recommend_policy(self, high_pressure_districts):
         if high_pressure_districts.empty:
             return "✅ **System Status Green**: No immediate critical interventions required. Maintain current operational cadence."
-            
+        return self.generate_response(self.policy_prompt(high_pressure_districts))
+
+    @staticmethod
+    def policy_prompt(high_pressure_districts):
         # Take top 5 for context
         top_5 = high_pressure_districts.head(5).to_dict(orient='records')
         
@@ -100,4 +291,4 @@ class GeminiService:
         
         **Tone**: Authoritative, Urgent, and Solution-Oriented.
         """
-        return self.generate_response(prompt)
+        return prompt
@@ -0,0 +1,125 @@
+
+import logging
+import numpy as np
+import pandas as pd
+from aadhaar_analytics.utils import constants
+
+logger = logging.getLogger(__name__)
+
+# Rough token count of English/CSV text for Gemini-style tokenizers
+CHARS_PER_TOKEN = 4
+# Fewest points kept by the downsampled series (first, last and one between)
+MIN_POINTS = 3
+
+def estimate_tokens(text):
+    """Approximate number of tokens in `text`."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def lttb(x, y, n):
+    """
+    Largest-Triangle-Three-Buckets downsampling: positions of `n` points of
+    the series (x, y) that keep its visual shape (peaks and troughs). The
+    first and last points are always kept.
+    """
+    size = len(y)
+    if n >= size:
+        return np.arange(size)
+    n = max(n, MIN_POINTS)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n - 2 buckets between the fixed end points
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    keep = [0]
+    for b in range(n - 2):
+        lo, hi = edges[b], max(edges[b + 1], edges[b] + 1)
+        # Average of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else size
+        ax, ay = (x[nlo:nhi].mean(), y[nlo:nhi].mean()) if nhi > nlo else (x[-1], y[-1])
+        px, py = x[keep[-1]], y[keep[-1]]
+        area = np.abs((px - ax) * (y[lo:hi] - py) - (px - x[lo:hi]) * (ay - py))
+        keep.append(lo + int(area.argmax()))
+    keep.append(size - 1)
+    return np.array(keep)
+
+def _fmt(v):
+    return f"{v:.0f}" if abs(v) >= 100 else f"{v:.2f}"
+
+def _summary(df, cols):
+    lines = ["column,min,mean,max,total,last"]
+    for c in cols:
+        s = df[c]
+        lines.append(f"{c},{_fmt(s.min())},{_fmt(s.mean())},{_fmt(s.max())},{_fmt(s.sum())},{_fmt(s.iloc[-1])}")
+    return "\n".join(lines)
+
+def _peaks(df, date_col, total, top):
+    """The `top` largest points of the total with their z-scores."""
+    std = total.std()
+    lines = []
+    for i in total.nlargest(top).index:
+        z = (total[i] - total.mean()) / std if std > 0 else 0.0
+        when = df[date_col].iloc[i].date() if date_col else i
+        lines.append(f"- {when}: {_fmt(total[i])} (z={z:+.1f})")
+    return "\n".join(lines)
+
+def _monthly(df, date_col, cols, months):
+    """Totals of the last `months` months and their month-over-month change."""
+    monthly = df.set_index(date_col)[cols].resample('ME').sum().sum(axis=1).tail(months + 1)
+    if len(monthly) < 2:
+        return ""
+    change = monthly.pct_change() * 100
+    lines = ["month,total,mom_change_pct"]
+    for when, v in monthly.iloc[1:].items():
+        pct = change[when]
+        lines.append(f"{when:%Y-%m},{_fmt(v)},{'' if not np.isfinite(pct) else f'{pct:+.1f}'}")
+    return "\n".join(lines)
+
+def compact_trend(trend_df, budget=None, date_col=constants.COL_DATE, peaks=5, months=12):
+    """
+    Fits a trend frame (a date column plus numeric series) into about
+    `budget` tokens (default AI_PROMPT_TOKENS). Frames that already fit are
+    kept verbatim as CSV; larger ones become summary statistics, the largest
+    peaks, month-over-month deltas and an LTTB-downsampled series of the
+    rows, so the prompt size no longer grows with the history.
+    Returns (text, report) where report holds the token counts and ratio.
+    """
+    budget = constants.AI_PROMPT_TOKENS if budget is None else budget
+    full = trend_df.to_csv(index=False)
+    report = {"rows": len(trend_df), "tokens_in": estimate_tokens(full), "compacted": False}
+    if report["tokens_in"] <= budget or len(trend_df) <= MIN_POINTS:
+        report.update(tokens_out=report["tokens_in"], ratio=1.0, points=len(trend_df))
+        return full, report
+
+    df = trend_df.reset_index(drop=True)
+    date_col = date_col if date_col in df.columns else None
+    if date_col:
+        df[date_col] = pd.to_datetime(df[date_col])
+        df = df.sort_values(date_col, kind='stable').reset_index(drop=True)
+    cols = [c for c in df.select_dtypes('number').columns if c != date_col]
+    total = df[cols].sum(axis=1)
+
+    sections = [f"Summary of {len(df)} rows"
+                + (f" ({df[date_col].min().date()} to {df[date_col].max().date()})" if date_col else "")
+                + f":\n{_summary(df, cols)}",
+                f"Largest peaks (total of {', '.join(cols)}):\n{_peaks(df, date_col, total, peaks)}"]
+    if date_col:
+        monthly = _monthly(df, date_col, cols, months)
+        if monthly:
+            sections.append(f"Month-over-month:\n{monthly}")
+    header = "\n\n".join(sections)
+
+    # Spend what is left of the budget on sampled rows, shrinking until it fits
+    x = df[date_col].astype('int64') if date_col else np.arange(len(df))
+    row_tokens = max(1, report["tokens_in"] // (len(df) + 1))
+    n = min(len(df), max(MIN_POINTS, (budget - estimate_tokens(header)) // row_tokens))
+    while True:
+        sample = df.iloc[lttb(x, total, n)]
+        text = f"{header}\n\nShape-preserving sample of {len(sample)} rows (CSV):\n{sample.to_csv(index=False)}"
+        if estimate_tokens(text) <= budget or n <= MIN_POINTS:
+            break
+        n = max(MIN_POINTS, int(n * 0.8))
+
+    tokens = estimate_tokens(text)
+    report.update(tokens_out=tokens, ratio=round(report["tokens_in"] / tokens, 1), points=len(sample), compacted=True)
+    logger.info(f"Compacted trend prompt data: {report['rows']} rows, "
+                f"{report['tokens_in']} -> {tokens} tokens ({report['ratio']}x).")
+    return text, report
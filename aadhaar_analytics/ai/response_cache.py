@@ -0,0 +1,118 @@
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from aadhaar_analytics.utils import constants
+from aadhaar_analytics.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Cache layout under constants.AI_CACHE_DIR:
+#   <key[:2]>/<key>.json   {"model", "created_at", "response"}, key = sha256(model, prompt)
+# A file's mtime is its last use, so eviction drops the least recently used.
+# Recent entries are also kept in memory, so repeated prompts skip the disk.
+
+def response_key(model, prompt):
+    """Content address of a prompt for a model."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """Persistent model-response cache with a TTL and a bound on the number of entries."""
+    def __init__(self, path=None, ttl=None, maxsize=None, memory_size=256):
+        self.path = path or constants.AI_CACHE_DIR
+        self.ttl = constants.AI_CACHE_TTL if ttl is None else ttl
+        self.maxsize = constants.AI_CACHE_SIZE if maxsize is None else maxsize
+        self._memory = LRUCache(memory_size)
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def _expired(self, created_at):
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, model, prompt):
+        """The cached response, or None if there is none or it has expired."""
+        key = response_key(model, prompt)
+        entry = self._memory.get(key)
+        if entry is None:
+            try:
+                with open(self._file(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._memory.put(key, entry)
+        if self._expired(entry["created_at"]):
+            self.discard(key)
+            return None
+        try:
+            os.utime(self._file(key))
+        except OSError:
+            pass
+        return entry["response"]
+
+    def put(self, model, prompt, response):
+        key = response_key(model, prompt)
+        entry = {"model": model, "created_at": time.time(), "response": response}
+        self._memory.put(key, entry)
+        path = self._file(key)
+        tmp = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write AI cache entry {path}: {e}")
+            return
+        with self._lock:
+            if self._entries is not None:
+                self._entries += 1
+        self._evict()
+
+    def discard(self, key):
+        self._memory.pop(key)
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _files(self):
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _evict(self):
+        """Drops the least recently used entries down to 90% of maxsize once over it."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = sum(1 for _ in self._files())
+            if self.maxsize <= 0 or self._entries <= self.maxsize:
+                return
+            files = sorted(self._files(), key=lambda p: os.path.getmtime(p))
+            drop = files[:len(files) - int(self.maxsize * 0.9)]
+            for p in drop:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            self._entries = len(files) - len(drop)
+            self._memory.clear()
+            logger.info(f"Evicted {len(drop)} AI cache entries.")
+
+_DEFAULT = None
+
+def default_cache():
+    """The process-wide cache (None when AI caching is disabled)."""
+    global _DEFAULT
+    if not constants.AI_CACHE_ENABLED:
+        return None
+    if _DEFAULT is None:
+        _DEFAULT = ResponseCache()
+    return _DEFAULT
@@ -0,0 +1,270 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from aadhaar_analytics.utils import constants, partitions, columnar
+
+class AggregateCube:
+    """
+    Dense date x region x measure totals for all three datasets, built once at
+    load time. Regions are (state, district) pairs sorted by state, so every
+    query is a NumPy reduction over the cube instead of a scan of the rows.
+    """
+    DATASETS = list(constants.MEASURE_COLUMNS.keys())
+    # Calendar-style aliases accepted by resample()
+    FREQ_ALIASES = {'M': 'ME', 'Q': 'QE', 'Y': 'YE'}
+
+    def __init__(self, df_enr, df_demo, df_bio):
+        frames = dict(zip(self.DATASETS, [df_enr, df_demo, df_bio]))
+        frames = {k: v for k, v in frames.items() if v is not None and not v.empty}
+
+        # Dimensions: union of dates and of (state, district) pairs
+        dates = [df[constants.COL_DATE].dropna().unique() for df in frames.values()]
+        self.dates = pd.DatetimeIndex(np.unique(np.concatenate(dates))) if dates else pd.DatetimeIndex([])
+
+        pairs = [df[[constants.COL_STATE, constants.COL_DISTRICT]].astype(str).drop_duplicates() for df in frames.values()]
+        regions = pd.concat(pairs).drop_duplicates() if pairs else pd.DataFrame(columns=[constants.COL_STATE, constants.COL_DISTRICT])
+        self.regions = regions.sort_values([constants.COL_STATE, constants.COL_DISTRICT]).reset_index(drop=True)
+        region_index = pd.MultiIndex.from_frame(self.regions)
+        # Row range of every state along the (state-sorted) region axis
+        self.state_offsets = partitions.state_offsets(self.regions[constants.COL_STATE].to_numpy())
+
+        # Per dataset: date x region x measure sums, and the source rows per cell
+        # (for "mean per row" style metrics)
+        n_dates, n_regions = len(self.dates), len(self.regions)
+        self.values, self.counts = {}, {}
+        self._prefix = {}
+        for dataset_type in self.DATASETS:
+            cols = constants.MEASURE_COLUMNS[dataset_type]
+            self.values[dataset_type] = np.zeros((n_dates, n_regions, len(cols)), dtype=np.int64)
+            self.counts[dataset_type] = np.zeros((n_dates, n_regions), dtype=np.int32)
+
+        for dataset_type, df in frames.items():
+            df = df.dropna(subset=constants.AGGREGATE_GRAIN)
+            d_idx = self.dates.get_indexer(df[constants.COL_DATE])
+            r_idx = region_index.get_indexer(pd.MultiIndex.from_arrays([
+                df[constants.COL_STATE].astype(str), df[constants.COL_DISTRICT].astype(str)
+            ]))
+            flat = d_idx * n_regions + r_idx
+            size = n_dates * n_regions
+            self.counts[dataset_type][:] = np.bincount(flat, minlength=size).reshape(n_dates, n_regions)
+            for m, c in enumerate(constants.MEASURE_COLUMNS[dataset_type]):
+                if c in df.columns:
+                    sums = np.bincount(flat, weights=df[c].to_numpy(dtype=np.float64), minlength=size)
+                    self.values[dataset_type][:, :, m] = np.rint(sums).astype(np.int64).reshape(n_dates, n_regions)
+
+    # --- Persistence ---
+    def save(self, path):
+        """Writes the cube arrays to a directory (`.npy` files, regions as a columnar frame)."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "dates.npy"), self.dates.to_numpy(dtype='datetime64[ns]'))
+        columnar.save_frame(self.regions, os.path.join(path, "regions"))
+        for dataset_type in self.DATASETS:
+            np.save(os.path.join(path, f"{dataset_type}.values.npy"), self.values[dataset_type])
+            np.save(os.path.join(path, f"{dataset_type}.counts.npy"), self.counts[dataset_type])
+            np.save(os.path.join(path, f"{dataset_type}.prefix.npy"), self.prefix(dataset_type))
+            np.save(os.path.join(path, f"{dataset_type}.rows.npy"), self.row_prefix(dataset_type))
+        with open(os.path.join(path, columnar.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"datasets": self.DATASETS}, f)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """Reads a cube written by `save`; with `mmap=True` the arrays are mapped read-only."""
+        mode = 'r' if mmap else None
+        cube = object.__new__(cls)
+        cube.dates = pd.DatetimeIndex(np.load(os.path.join(path, "dates.npy")))
+        cube.regions = columnar.load_frame(os.path.join(path, "regions"))
+        cube.state_offsets = partitions.state_offsets(cube.regions[constants.COL_STATE].to_numpy())
+        cube.values = {k: np.load(os.path.join(path, f"{k}.values.npy"), mmap_mode=mode) for k in cls.DATASETS}
+        cube.counts = {k: np.load(os.path.join(path, f"{k}.counts.npy"), mmap_mode=mode) for k in cls.DATASETS}
+        # Prefix sums are stored too, so mapped cubes share them instead of each
+        # process computing its own copy
+        cube._prefix = {k: np.load(os.path.join(path, f"{k}.prefix.npy"), mmap_mode=mode)
+                        for k in cls.DATASETS if os.path.exists(os.path.join(path, f"{k}.prefix.npy"))}
+        cube._prefix.update({(k, 'rows'): np.load(os.path.join(path, f"{k}.rows.npy"), mmap_mode=mode)
+                             for k in cls.DATASETS if os.path.exists(os.path.join(path, f"{k}.rows.npy"))})
+        return cube
+
+    # --- Selection ---
+    def _subset(self, region_sel=None, date_sel=None):
+        """New cube over a subset of regions/dates, sharing everything else."""
+        cube = object.__new__(AggregateCube)
+        region_sel = slice(None) if region_sel is None else region_sel
+        date_sel = slice(None) if date_sel is None else date_sel
+        all_regions = isinstance(region_sel, slice) and region_sel == slice(None)
+        cube.dates = self.dates[date_sel]
+        cube.regions = self.regions.iloc[region_sel].reset_index(drop=True)
+        cube.state_offsets = self.state_offsets if all_regions else \
+            partitions.state_offsets(cube.regions[constants.COL_STATE].to_numpy())
+        # Slices keep every array a view of the parent's
+        cube.values = {k: v[date_sel][:, region_sel] for k, v in self.values.items()}
+        cube.counts = {k: v[date_sel][:, region_sel] for k, v in self.counts.items()}
+        cube._prefix = {}
+        if isinstance(date_sel, slice):
+            # Only differences of prefix sums are used, so a sub-cube can share
+            # the parent's index (offset by a constant): a view when the regions
+            # are a slice, a copy of the selected columns otherwise
+            stop = None if date_sel.stop is None else date_sel.stop + 1
+            for k, v in self._prefix.items():
+                if isinstance(k, tuple) and k[1] == 'all regions':
+                    if all_regions:
+                        cube._prefix[k] = v[date_sel.start:stop]
+                else:
+                    cube._prefix[k] = v[date_sel.start:stop][:, region_sel]
+        return cube
+
+    def select(self, states=None):
+        """
+        Restricts the cube to one state or a list of states (None/"All" =
+        everything). Adjacent states come back as views of this cube.
+        """
+        states = partitions.normalize_selection(states)
+        if states is None:
+            return self
+        runs = partitions.selection_runs(self.state_offsets, states)
+        return self._subset(region_sel=partitions.runs_indexer(runs))
+
+    def date_bounds(self, start=None, end=None):
+        """Half-open date-axis positions [lo, hi) of the inclusive window [start, end]."""
+        lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start).normalize(), side='left'))
+        hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end).normalize(), side='right'))
+        return lo, max(lo, hi)
+
+    def window(self, start=None, end=None):
+        """
+        Restricts the cube to dates in [start, end] (either bound optional);
+        arrays are views. The window shares this cube's prefix sums, so its
+        totals are prefix[hi] - prefix[lo] however many dates it spans.
+        """
+        if start is None and end is None:
+            return self
+        lo, hi = self.date_bounds(start, end)
+        for dataset_type in self.DATASETS:
+            self.prefix(dataset_type)
+            self.row_prefix(dataset_type)
+        return self._subset(date_sel=slice(lo, hi))
+
+    # --- Time index ---
+    def prefix(self, dataset_type):
+        """
+        Cumulative sums along the date axis with a leading zero row, shape
+        (n_dates + 1, n_regions, n_measures). Totals over date positions
+        [lo, hi) are prefix[hi] - prefix[lo]; only differences are meaningful.
+        """
+        if dataset_type not in self._prefix:
+            vals = self.values[dataset_type]
+            out = np.zeros((vals.shape[0] + 1,) + vals.shape[1:], dtype=np.int64)
+            np.cumsum(vals, axis=0, out=out[1:])
+            self._prefix[dataset_type] = out
+        return self._prefix[dataset_type]
+
+    def row_prefix(self, dataset_type):
+        """Like prefix() for the source-row counts, shape (n_dates + 1, n_regions)."""
+        key = (dataset_type, 'rows')
+        if key not in self._prefix:
+            counts = self.counts[dataset_type]
+            out = np.zeros((counts.shape[0] + 1,) + counts.shape[1:], dtype=np.int64)
+            np.cumsum(counts, axis=0, out=out[1:])
+            self._prefix[key] = out
+        return self._prefix[key]
+
+    def range_totals(self, dataset_type, start=None, end=None):
+        """Per-region measure totals over [start, end] as a (n_regions, n_measures) array."""
+        lo, hi = self.date_bounds(start, end)
+        p = self.prefix(dataset_type)
+        return p[hi] - p[lo]
+
+    def range_counts(self, dataset_type, start=None, end=None):
+        """Per-region source-row counts over [start, end] as a (n_regions,) array."""
+        lo, hi = self.date_bounds(start, end)
+        p = self.row_prefix(dataset_type)
+        return p[hi] - p[lo]
+
+    def resample(self, dataset_type, freq='ME'):
+        """
+        Measure totals per period (D/W/ME/QE or any pandas offset), summed over
+        regions, as a DataFrame like `df.set_index(date).resample(freq).sum()`.
+        Periods span the dates that hold rows of the dataset.
+        """
+        cols = constants.MEASURE_COLUMNS[dataset_type]
+        present = np.flatnonzero(self.counts[dataset_type].any(axis=1))
+        if len(present) == 0:
+            return pd.DataFrame(columns=[constants.COL_DATE] + cols)
+        first, last = present[0], present[-1] + 1
+
+        # Date positions bounding each period; totals are prefix differences
+        positions = pd.Series(np.arange(first, last), index=self.dates[first:last])
+        sizes = positions.resample(self.FREQ_ALIASES.get(freq, freq)).size()
+        ends = first + np.cumsum(sizes.to_numpy())
+        starts = ends - sizes.to_numpy()
+        key = (dataset_type, 'all regions')
+        if key not in self._prefix:
+            self._prefix[key] = self.prefix(dataset_type).sum(axis=1)
+        p = self._prefix[key]
+
+        out = pd.DataFrame(p[ends] - p[starts], columns=cols)
+        out.insert(0, constants.COL_DATE, sizes.index)
+        return out
+
+    # --- Helpers ---
+    def states(self):
+        """Sorted list of states present in the cube."""
+        return list(self.state_offsets)
+
+    def has(self, dataset_type):
+        """True if any row of the dataset falls inside this cube."""
+        return bool(self.range_counts(dataset_type).any())
+
+    def _values(self, dataset_type):
+        return constants.MEASURE_COLUMNS[dataset_type], self.values[dataset_type]
+
+    # --- Aggregates ---
+    # Totals over the date axis are prefix differences, so their cost does not
+    # grow with the length of a window
+    def totals(self, dataset_type):
+        """Series of measure -> total for a dataset."""
+        cols = constants.MEASURE_COLUMNS[dataset_type]
+        return pd.Series(self.range_totals(dataset_type).sum(axis=0), index=cols)
+
+    def by_region(self, dataset_type):
+        """DataFrame of state, district and measure totals (regions with rows only)."""
+        cols = constants.MEASURE_COLUMNS[dataset_type]
+        present = self.range_counts(dataset_type) > 0
+        out = self.regions[present].reset_index(drop=True)
+        out[cols] = self.range_totals(dataset_type)[present]
+        return out
+
+    def by_state(self, dataset_type):
+        """DataFrame of state and measure totals (states with rows only)."""
+        df = self.by_region(dataset_type)
+        if df.empty:
+            return pd.DataFrame(columns=[constants.COL_STATE] + constants.MEASURE_COLUMNS[dataset_type])
+        cols = constants.MEASURE_COLUMNS[dataset_type]
+        return df.groupby(constants.COL_STATE, sort=True)[cols].sum().reset_index()
+
+    def by_date(self, dataset_type):
+        """DataFrame of date and measure totals (dates with rows only)."""
+        cols, vals = self._values(dataset_type)
+        present = self.counts[dataset_type].any(axis=1)
+        out = pd.DataFrame(vals.sum(axis=1)[present], columns=cols)
+        out.insert(0, constants.COL_DATE, self.dates[present])
+        return out
+
+    def region_means(self, dataset_type):
+        """
+        DataFrame of state, district and the mean per-row total of a dataset
+        (sum over the region's rows / number of rows), as column 'total'.
+        """
+        counts = self.range_counts(dataset_type)
+        present = counts > 0
+        out = self.regions[present].reset_index(drop=True)
+        out['total'] = self.range_totals(dataset_type).sum(axis=1)[present] / counts[present]
+        return out
+
+    def kpis(self):
+        """Same dictionary as feature_engineering.calculate_kpis, from the cube."""
+        return {
+            'total_enrolments': int(self.totals('enrolment').sum()),
+            'total_demo_updates': int(self.totals('demographic').sum()),
+            'total_bio_updates': int(self.totals('biometric').sum())
+        }
@@ -3,13 +3,20 @@ import pandas as pd
 from aadhaar_analytics.utils import constants
 
 class DescriptiveAnalytics:
-    def __init__(self, df_enr, df_demo, df_bio):
+    def __init__(self, df_enr=None, df_demo=None, df_bio=None, cube=None):
         self.df_enr = df_enr
         self.df_demo = df_demo
         self.df_bio = df_bio
+        # Optional AggregateCube: when given, every query is answered from it
+        self.cube = cube
 
     def get_state_wise_summary(self, dataset_type='enrolment'):
         """Returns aggregated metrics by State."""
+        if self.cube is not None:
+            if dataset_type not in constants.MEASURE_COLUMNS or not self.cube.has(dataset_type):
+                return pd.DataFrame()
+            return self.cube.by_state(dataset_type)
+
         if dataset_type == 'enrolment':
             df = self.df_enr
             cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
@@ -29,6 +36,11 @@ class DescriptiveAnalytics:
 
     def get_trend_analysis(self, dataset_type='enrolment', freq='ME'):
         """Returns time-series trend."""
+        if self.cube is not None:
+            if dataset_type not in constants.MEASURE_COLUMNS or not self.cube.has(dataset_type):
+                return pd.DataFrame()
+            return self.cube.resample(dataset_type, freq)
+
         if dataset_type == 'enrolment':
             df = self.df_enr
             cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
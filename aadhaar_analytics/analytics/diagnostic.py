@@ -4,31 +4,51 @@ import numpy as np
 from aadhaar_analytics.utils import constants
 
 class DiagnosticAnalytics:
-    def __init__(self, df_enr, df_demo, df_bio):
+    def __init__(self, df_enr=None, df_demo=None, df_bio=None, cube=None):
         self.df_enr = df_enr
         self.df_demo = df_demo
         self.df_bio = df_bio
+        # Optional AggregateCube: when given, every query is answered from it
+        self.cube = cube
+
+    def _has(self, dataset_type, df):
+        return self.cube.has(dataset_type) if self.cube is not None else not df.empty
+
+    def _state_total(self, dataset_type, df, cols, name):
+        """Per-state total of a dataset as a (state, name) frame."""
+        if self.cube is not None:
+            agg = self.cube.by_state(dataset_type)
+            return pd.DataFrame({constants.COL_STATE: agg[constants.COL_STATE], name: agg[cols].sum(axis=1)})
+        return df.groupby(constants.COL_STATE)[cols].sum().sum(axis=1).reset_index(name=name)
+
+    def _daily_total(self, dataset_type, df, cols, name):
+        """Per-date total of a dataset as a named Series."""
+        if self.cube is not None:
+            return self.cube.by_date(dataset_type).set_index(constants.COL_DATE)[cols].sum(axis=1).rename(name)
+        return df.groupby(constants.COL_DATE)[cols].sum().sum(axis=1).rename(name)
 
     def calculate_update_vs_enrolment_ratio(self):
         """Calculates ratio of total updates (demo+bio) to enrolments per state."""
-        if self.df_enr.empty or (self.df_demo.empty and self.df_bio.empty):
+        has_demo = self._has('demographic', self.df_demo)
+        has_bio = self._has('biometric', self.df_bio)
+        if not self._has('enrolment', self.df_enr) or not (has_demo or has_bio):
             return pd.DataFrame()
 
         # Enrolment Total per State
         enr_cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
-        enr_agg = self.df_enr.groupby(constants.COL_STATE)[enr_cols].sum().sum(axis=1).reset_index(name='total_enrolments')
+        enr_agg = self._state_total('enrolment', self.df_enr, enr_cols, 'total_enrolments')
 
         # Demo Total
         demo_cols = [constants.COL_DEMO_AGE_5_17, constants.COL_DEMO_AGE_18_PLUS]
         demo_agg = pd.DataFrame()
-        if not self.df_demo.empty:
-            demo_agg = self.df_demo.groupby(constants.COL_STATE)[demo_cols].sum().sum(axis=1).reset_index(name='total_demo')
+        if has_demo:
+            demo_agg = self._state_total('demographic', self.df_demo, demo_cols, 'total_demo')
         
         # Bio Total
         bio_cols = [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS]
         bio_agg = pd.DataFrame()
-        if not self.df_bio.empty:
-            bio_agg = self.df_bio.groupby(constants.COL_STATE)[bio_cols].sum().sum(axis=1).reset_index(name='total_bio')
+        if has_bio:
+            bio_agg = self._state_total('biometric', self.df_bio, bio_cols, 'total_bio')
 
         # Merge
         merged = enr_agg
@@ -57,16 +77,16 @@ class DiagnosticAnalytics:
         
         data_frames = []
         
-        if not self.df_enr.empty:
-            enr = self.df_enr.groupby(constants.COL_DATE)[[constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]].sum().sum(axis=1).rename('Enrolments')
+        if self._has('enrolment', self.df_enr):
+            enr = self._daily_total('enrolment', self.df_enr, [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS], 'Enrolments')
             data_frames.append(enr)
             
-        if not self.df_demo.empty:
-            demo = self.df_demo.groupby(constants.COL_DATE)[[constants.COL_DEMO_AGE_5_17, constants.COL_DEMO_AGE_18_PLUS]].sum().sum(axis=1).rename('Demographic Updates')
+        if self._has('demographic', self.df_demo):
+            demo = self._daily_total('demographic', self.df_demo, [constants.COL_DEMO_AGE_5_17, constants.COL_DEMO_AGE_18_PLUS], 'Demographic Updates')
             data_frames.append(demo)
             
-        if not self.df_bio.empty:
-            bio = self.df_bio.groupby(constants.COL_DATE)[[constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS]].sum().sum(axis=1).rename('Biometric Updates')
+        if self._has('biometric', self.df_bio):
+            bio = self._daily_total('biometric', self.df_bio, [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS], 'Biometric Updates')
             data_frames.append(bio)
             
         if not data_frames:
@@ -84,21 +104,25 @@ class DiagnosticAnalytics:
         target_col = 'total'
         
         if dataset_type == 'enrolment':
-            df = self.df_enr.copy()
+            df = self.df_enr
             cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
         elif dataset_type == 'biometric':
-            df = self.df_bio.copy()
+            df = self.df_bio
             cols = [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS]
         else:
             return pd.DataFrame()
             
-        if df.empty:
+        if not self._has(dataset_type, df):
             return pd.DataFrame()
             
-        df[target_col] = df[cols].sum(axis=1)
-        
-        # Group by District Aggregates (Sum over time)
-        dist_agg = df.groupby([constants.COL_STATE, constants.COL_DISTRICT])[target_col].mean().reset_index()
+        if self.cube is not None:
+            dist_agg = self.cube.region_means(dataset_type)
+        else:
+            df = df.copy()
+            df[target_col] = df[cols].sum(axis=1)
+
+            # Group by District Aggregates (Sum over time)
+            dist_agg = df.groupby([constants.COL_STATE, constants.COL_DISTRICT])[target_col].mean().reset_index()
         
         # Calculate IQR
         Q1 = dist_agg[target_col].quantile(0.25)
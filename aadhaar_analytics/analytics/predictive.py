@@ -4,28 +4,42 @@ import numpy as np
 from aadhaar_analytics.utils import constants
 
 class PredictiveAnalytics:
-    def __init__(self, df_enr, df_bio):
+    def __init__(self, df_enr=None, df_bio=None, cube=None):
         self.df_enr = df_enr
         self.df_bio = df_bio
+        # Optional AggregateCube: when given, monthly totals come from it
+        self.cube = cube
+
+    def _monthly_total(self, dataset_type):
+        """Monthly total series of a dataset from the cube, or None if it has no rows."""
+        if not self.cube.has(dataset_type):
+            return None
+        monthly = self.cube.resample(dataset_type, 'ME').set_index(constants.COL_DATE)
+        return monthly.sum(axis=1)
 
     def forecast_enrolment_demand(self, periods=3):
         """
         Simple Moving Average + Linear Trend forecast for next `periods` months.
         Returns DataFrame with actuals and forecast.
         """
-        if self.df_enr.empty:
-            return pd.DataFrame()
+        if self.cube is not None:
+            ts = self._monthly_total('enrolment')
+            if ts is None:
+                return pd.DataFrame()
+        else:
+            if self.df_enr.empty:
+                return pd.DataFrame()
 
-        # Aggregating total enrolments by month
-        df = self.df_enr.copy()
-        df['total'] = df[constants.COL_ENR_AGE_0_5] + df[constants.COL_ENR_AGE_5_17] + df[constants.COL_ENR_AGE_18_PLUS]
-        
-        # Resample to Monthly
-        if constants.COL_DATE not in df.columns:
-            # Assumes index is datetime if col missing, else return empty
-            return pd.DataFrame()
+            # Aggregating total enrolments by month
+            df = self.df_enr.copy()
+            df['total'] = df[constants.COL_ENR_AGE_0_5] + df[constants.COL_ENR_AGE_5_17] + df[constants.COL_ENR_AGE_18_PLUS]
 
-        ts = df.set_index(constants.COL_DATE)['total'].resample('ME').sum()
+            # Resample to Monthly
+            if constants.COL_DATE not in df.columns:
+                # Assumes index is datetime if col missing, else return empty
+                return pd.DataFrame()
+
+            ts = df.set_index(constants.COL_DATE)['total'].resample('ME').sum()
         
         if len(ts) < 2:
             return pd.DataFrame() # Not enough data
@@ -62,13 +76,18 @@ class PredictiveAnalytics:
 
     def forecast_biometric_load(self, periods=3):
         """Forecast for Biometric Updates."""
-        if self.df_bio.empty:
-            return pd.DataFrame()
+        if self.cube is not None:
+            ts = self._monthly_total('biometric')
+            if ts is None:
+                return pd.DataFrame()
+        else:
+            if self.df_bio.empty:
+                return pd.DataFrame()
 
-        df = self.df_bio.copy()
-        df['total'] = df[constants.COL_BIO_AGE_5_17] + df[constants.COL_BIO_AGE_18_PLUS]
-        
-        ts = df.set_index(constants.COL_DATE)['total'].resample('ME').sum()
+            df = self.df_bio.copy()
+            df['total'] = df[constants.COL_BIO_AGE_5_17] + df[constants.COL_BIO_AGE_18_PLUS]
+
+            ts = df.set_index(constants.COL_DATE)['total'].resample('ME').sum()
         
         if len(ts) < 2:
             return pd.DataFrame()
@@ -3,9 +3,23 @@ import pandas as pd
 from aadhaar_analytics.utils import constants
 
 class PrescriptiveAnalytics:
-    def __init__(self, df_enr, df_bio):
+    def __init__(self, df_enr=None, df_bio=None, cube=None):
         self.df_enr = df_enr
         self.df_bio = df_bio
+        # Optional AggregateCube: when given, district loads come from it
+        self.cube = cube
+
+    def _district_load(self, dataset_type, df, cols):
+        """Mean load per district (state, district, total), or None if there are no rows."""
+        if self.cube is not None:
+            return self.cube.region_means(dataset_type) if self.cube.has(dataset_type) else None
+        if df.empty:
+            return None
+        df = df.copy()
+        df['total'] = df[cols].sum(axis=1)
+        # Group by District (mean monthly load or total)
+        # Assuming data is monthly, let's take average monthly load per district
+        return df.groupby([constants.COL_STATE, constants.COL_DISTRICT])['total'].mean().reset_index()
 
     def get_recommendations(self, threshold_enr=1000, threshold_bio=500):
         """
@@ -16,13 +30,9 @@ class PrescriptiveAnalytics:
         recommendations = []
         
         # 1. High Enrolment Load
-        if not self.df_enr.empty:
-            df = self.df_enr.copy()
-            df['total'] = df[constants.COL_ENR_AGE_0_5] + df[constants.COL_ENR_AGE_5_17] + df[constants.COL_ENR_AGE_18_PLUS]
-            # Group by District (mean monthly load or total)
-            # Assuming data is monthly, let's take average monthly load per district
-            load = df.groupby([constants.COL_STATE, constants.COL_DISTRICT])['total'].mean().reset_index()
-            
+        load = self._district_load('enrolment', self.df_enr,
+                                   [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS])
+        if load is not None:
             high_load = load[load['total'] > threshold_enr]
             for _, row in high_load.iterrows():
                 recommendations.append({
@@ -34,11 +44,9 @@ class PrescriptiveAnalytics:
                 })
 
         # 2. High Biometric Update Load
-        if not self.df_bio.empty:
-            df = self.df_bio.copy()
-            df['total'] = df[constants.COL_BIO_AGE_5_17] + df[constants.COL_BIO_AGE_18_PLUS]
-            load = df.groupby([constants.COL_STATE, constants.COL_DISTRICT])['total'].mean().reset_index()
-            
+        load = self._district_load('biometric', self.df_bio,
+                                   [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS])
+        if load is not None:
             high_bio = load[load['total'] > threshold_bio]
             for _, row in high_bio.iterrows():
                 recommendations.append({
@@ -9,15 +9,16 @@ import json
 # Ensure project root is in path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from aadhaar_analytics.ingestion import loader
-from aadhaar_analytics.preprocessing import cleaning, feature_engineering
+from aadhaar_analytics.ingestion import snapshot
+from aadhaar_analytics.preprocessing import feature_engineering
 from aadhaar_analytics.analytics.descriptive import DescriptiveAnalytics
 from aadhaar_analytics.analytics.diagnostic import DiagnosticAnalytics
 from aadhaar_analytics.analytics.predictive import PredictiveAnalytics
 from aadhaar_analytics.analytics.prescriptive import PrescriptiveAnalytics
 from aadhaar_analytics.ai.gemini_service import GeminiService
+from aadhaar_analytics.dashboard.measures import get_measure_gauge, get_measure_trend, get_measure_outliers
 from aadhaar_analytics.visualization import charts
-from aadhaar_analytics.utils import constants
+from aadhaar_analytics.utils import constants, partitions
 
 st.set_page_config(page_title="UIDAI Aadhaar Analytics", layout="wide", page_icon="🇮🇳")
 
@@ -76,31 +77,37 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+@st.cache_resource
+def load_state():
+    """Processed frames and cube, memory-mapped from the snapshot when it is current."""
+    # Shared read-only across sessions (not copied per rerun like st.cache_data)
+    return snapshot.load_state()
+
 def load_data():
     """Loads and cleans data."""
-    data = loader.load_all_datasets()
+    # Cleaned, feature-engineered date x state x district totals
+    data, _ = load_state()
     
-    # Enrolment
     df_enr = data.get('enrolment', pd.DataFrame())
-    df_enr = cleaning.clean_dataframe(df_enr, 'enrolment')
-    df_enr = feature_engineering.add_time_features(df_enr)
-
-    # Demographic
     df_demo = data.get('demographic', pd.DataFrame())
-    df_demo = cleaning.clean_dataframe(df_demo, 'demographic')
-    df_demo = feature_engineering.add_time_features(df_demo)
-
-    # Biometric
     df_bio = data.get('biometric', pd.DataFrame())
-    df_bio = cleaning.clean_dataframe(df_bio, 'biometric')
-    df_bio = feature_engineering.add_time_features(df_bio)
 
     return df_enr, df_demo, df_bio
 
+def load_cube():
+    """The pre-aggregated cube the analytics modules answer from."""
+    return load_state()[1]
+
+@st.cache_resource
+def load_partitions():
+    """Partitions each dataset by state once so the state filter is a slice."""
+    return tuple(partitions.StatePartitions(df) for df in load_data())
+
 # Load Data
 with st.spinner('Loading Aadhaar Datasets...'):
     df_enr, df_demo, df_bio = load_data()
+    cube = load_cube()
+    parts_enr, parts_demo, parts_bio = load_partitions()
 
 # --- Sidebar Filters ---
 # --- Sidebar Filters & AI Config ---
@@ -116,11 +123,37 @@ except ImportError:
     api_key_env = None
 
 api_key = api_key_env or st.sidebar.text_input("🔑 Gemini API Key", type="password", help="Enter your Google Gemini API Key to enable AI insights.")
-gemini = GeminiService(api_key) if api_key else None
+# Offline mode answers from the AI response cache without a key
+gemini = GeminiService(api_key) if api_key or constants.AI_OFFLINE else None
 
-if not api_key:
+if constants.AI_OFFLINE:
+    st.sidebar.info("📴 AI offline mode: showing cached insights only")
+elif not api_key:
     st.sidebar.warning("⚠️ Enter API Key for AI features")
 
+# AI panels are placeholders until the end of the script, where their answers
+# stream in; the charts of every tab render without waiting on the model.
+AI_PANELS = []
+
+def ai_panel(key, prompt, fallback, render):
+    """Reserves a panel for an AI answer; `render(slot, text, done)` draws it."""
+    slot = st.empty()
+    if key in st.session_state:
+        render(slot, st.session_state[key], True)
+    else:
+        render(slot, "⏳ Generating...", False)
+        AI_PANELS.append((key, prompt, fallback, slot, render))
+
+def stream_ai_panels():
+    for key, prompt, fallback, slot, render in AI_PANELS:
+        text = ""
+        for text in gemini.stream_response(prompt, fallback=fallback):
+            render(slot, text, False)
+        render(slot, text, True)
+        # Fallbacks are not kept, so the next rerun asks again (or hits the cache)
+        if not text.startswith(fallback):
+            st.session_state[key] = text
+
 st.sidebar.divider()
 
 st.sidebar.divider()
@@ -137,19 +170,33 @@ if not df_bio.empty and constants.COL_STATE in df_bio.columns:
     all_states.update(df_bio[constants.COL_STATE].dropna().unique().tolist())
 
 all_states = sorted(list(all_states))
-selected_state = st.sidebar.selectbox("Select State", ["All"] + all_states)
+selected_states = st.sidebar.multiselect("Select State(s)", all_states, placeholder="All")
+selected_state = partitions.selection_label(selected_states)
+
+# Date Range Filter
+start_date, end_date = None, None
+if len(cube.dates):
+    min_date, max_date = cube.dates.min().date(), cube.dates.max().date()
+    date_range = st.sidebar.date_input("Date Range", value=(min_date, max_date), min_value=min_date, max_value=max_date)
+    # The widget returns a 1-tuple while the second date is being picked
+    if len(date_range) == 2 and tuple(date_range) != (min_date, max_date):
+        start_date, end_date = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
 
 # Filter Dataframes
-if selected_state != "All":
-    df_enr = df_enr[df_enr[constants.COL_STATE] == selected_state] if not df_enr.empty else df_enr
-    df_demo = df_demo[df_demo[constants.COL_STATE] == selected_state] if not df_demo.empty else df_demo
-    df_bio = df_bio[df_bio[constants.COL_STATE] == selected_state] if not df_bio.empty else df_bio
+df_enr, df_demo, df_bio = parts_enr.get(selected_states), parts_demo.get(selected_states), parts_bio.get(selected_states)
+if start_date is not None:
+    df_enr = df_enr[df_enr[constants.COL_DATE].between(start_date, end_date)] if not df_enr.empty else df_enr
+    df_demo = df_demo[df_demo[constants.COL_DATE].between(start_date, end_date)] if not df_demo.empty else df_demo
+    df_bio = df_bio[df_bio[constants.COL_DATE].between(start_date, end_date)] if not df_bio.empty else df_bio
+
+# Analytics answer from prefix-sum windows over the cube
+cube = cube.select(selected_states).window(start_date, end_date)
 
 # Initialize Analytics Modules
-desc_analytics = DescriptiveAnalytics(df_enr, df_demo, df_bio)
-diag_analytics = DiagnosticAnalytics(df_enr, df_demo, df_bio)
-pred_analytics = PredictiveAnalytics(df_enr, df_bio)
-presc_analytics = PrescriptiveAnalytics(df_enr, df_bio)
+desc_analytics = DescriptiveAnalytics(df_enr, df_demo, df_bio, cube=cube)
+diag_analytics = DiagnosticAnalytics(df_enr, df_demo, df_bio, cube=cube)
+pred_analytics = PredictiveAnalytics(df_enr, df_bio, cube=cube)
+presc_analytics = PrescriptiveAnalytics(df_enr, df_bio, cube=cube)
 
 # --- Header ---
 st.title("INDIA UIDAI Aadhaar Analytics Dashboard")
@@ -170,7 +217,7 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
 
 # --- Tab 1: Overview ---
 with tab1:
-    kpis = feature_engineering.calculate_kpis(df_enr, df_demo, df_bio)
+    kpis = cube.kpis()
     
     # --- Gauge & KPI Section ---
     g1, g2 = st.columns([1, 2])
@@ -233,20 +280,15 @@ with tab1:
         # Generate unique key for caching based on state and total enrolments (as a proxy for data change)
         kpi_state_key = f"kpi_summary_{selected_state}_{kpis.get('total_enrolments', 0)}"
         
-        if kpi_state_key not in st.session_state:
-            with st.spinner("🤖 AI Analyst is generating Executive Summary..."):
-                try:
-                    summary = gemini.explain_kpis(kpis, selected_state)
-                    st.session_state[kpi_state_key] = summary
-                except Exception as e:
-                    st.session_state[kpi_state_key] = f"AI Analysis failed: {str(e)}"
-
-        st.markdown(f"""
+        def render_summary(slot, text, done):
+            slot.markdown(f"""
         <div class="ai-box">
             <b>🤖 AI Executive Summary:</b><br>
-            {st.session_state[kpi_state_key]}
+            {text}
         </div>
         """, unsafe_allow_html=True)
+
+        ai_panel(kpi_state_key, GeminiService.kpi_prompt(kpis, selected_state), get_measure_gauge(saturation), render_summary)
     
     st.divider()
     
@@ -281,7 +323,8 @@ if not df_enr.empty:
         
         # Aggregate by State for the map
         if not df_enr.empty:
-            map_df = df_enr.groupby(constants.COL_STATE).size().reset_index(name='Total Enrolments')
+            enr_cols = constants.MEASURE_COLUMNS['enrolment']
+            map_df = df_enr.groupby(constants.COL_STATE, observed=True)[enr_cols].sum().sum(axis=1).reset_index(name='Total Enrolments')
             
             # Using 'properties.ST_NM' as the key in GeoJSON for State Name
             fig_map = charts.plot_choropleth(
@@ -370,18 +413,11 @@ with tab2:
 
     if gemini and 'trend_df' in locals() and not trend_df.empty:
         trend_key = f"trend_analysis_{selected_state}_{trend_df.shape[0]}"
-        
-        if trend_key not in st.session_state:
-             with st.spinner("🤖 AI Analyst is detecting trend patterns..."):
-                 try:
-                    analysis = gemini.analyze_trends(trend_df, "Enrolment")
-                    st.session_state[trend_key] = analysis
-                 except Exception as e:
-                     st.session_state[trend_key] = "Could not generate trend analysis."
 
         with st.expander("✨ AI Trend Analysis", expanded=True):
              st.markdown("#### Intelligent Pattern Recognition")
-             st.markdown(st.session_state[trend_key])
+             ai_panel(trend_key, GeminiService.trend_prompt(trend_df, "Enrolment"), get_measure_trend(),
+                      lambda slot, text, done: slot.markdown(text))
 
 # --- Tab 3: Demographic Updates ---
 with tab3:
@@ -564,16 +600,19 @@ with tab6:
             
             if gemini:
                 rec_key = f"policy_draft_{selected_state}_{len(recs)}"
-                if rec_key not in st.session_state:
-                     with st.spinner("🤖 AI Policy Consultant is drafting a directive..."):
-                         try:
-                             directive = gemini.recommend_policy(recs)
-                             st.session_state[rec_key] = directive
-                         except:
-                             st.session_state[rec_key] = "Policy generation pending..."
-                
+
+                def render_directive(slot, text, done):
+                    # The editable text area is drawn once the draft is complete
+                    if done:
+                        slot.text_area("Official Directive Draft", text, height=300)
+                    else:
+                        slot.markdown(text)
+
                 st.markdown("### 🏛️ Draft Policy Directive (AI Generated)")
-                st.text_area("Official Directive Draft", st.session_state[rec_key], height=300)
+                ai_panel(rec_key, GeminiService.policy_prompt(recs), get_measure_outliers(), render_directive)
     else:
         st.success("No critical high-load areas identified with current thresholds.")
 
+# --- AI panels ---
+if gemini:
+    stream_ai_panels()
@@ -1,69 +1,42 @@
 
+import time
+STARTED_AT = time.time()
+
 import gradio as gr
 import pandas as pd
-import plotly.express as px
 import sys
 import os
 import json
 import logging
-import numpy as np
+import inspect
+import threading
+import importlib
+from functools import partial
 
 # Ensure project root is in path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from aadhaar_analytics.ingestion import loader
-from aadhaar_analytics.preprocessing import cleaning, feature_engineering
+from aadhaar_analytics.ingestion import cache, snapshot
+from aadhaar_analytics.analytics.cube import AggregateCube
 from aadhaar_analytics.analytics.descriptive import DescriptiveAnalytics
 from aadhaar_analytics.analytics.diagnostic import DiagnosticAnalytics
 from aadhaar_analytics.analytics.predictive import PredictiveAnalytics
 from aadhaar_analytics.analytics.prescriptive import PrescriptiveAnalytics
-from aadhaar_analytics.ai.gemini_service import GeminiService
-from aadhaar_analytics.visualization import charts
-from aadhaar_analytics.utils import constants
-
-# --- MEASURE GENERATORS ---
-def get_measure_gauge(ratio):
-    if ratio < 30:
-        return "🇮🇳 **Strategic Measure**: ecosystem is in **Acquisition Mode**. \n**Action**: State Govt must deploy 'Mobile Aadhaar Vans' to uncovered Gram Panchayats immediately to boost enrolment numbers."
-    return "🇮🇳 **Strategic Measure**: ecosystem is in **Maintenance Mode**. \n**Action**: Shift focus to **Data Hygiene**. Launch awareness campaigns for residents to update their POI/POA documents online."
-
-def get_measure_bullet(val, target):
-    if val < target:
-        return "⚠️ **Correction Required**: Daily targets missed. \n**Action**: Regional Offices (RO) must review operator attendance and machine uptime. Consider incentives for operators working on weekends."
-    return "✅ **On Track**: Targets met. \n**Action**: Maintain momentum. Conduct random quality audits to ensure speed isn't compromising data quality."
-
-def get_measure_map():
-    return "🗺️ **Regional Strategy**: \n**Action**: For 'Low Saturation' states (Lighter), integrate Aadhaar Enrolment with PDS (Ration) shops. For 'High Saturation' states (Darker), focus on Biometric Update Centers."
-
-def get_measure_bar():
-    return "📊 **Volume Management**: \n**Action**: Top 3 states require dedicated 'Server Lanes' in the CIDR backend to prevent latency during peak hours."
-
-def get_measure_tree():
-    return "🌳 **Demographic targeting**: \n**Action**: If 0-5 age group is small in any district, District Magistrates should mandate 'Aadhaar Camps' in Anganwadis and Maternity Wards."
-
-def get_measure_pie():
-    return "🍰 **Lifecycle Policy**: \n**Action**: **Baal Aadhaar (0-5)** requires 100% linkage with Birth Certificates. **Youth (5-17)** requires mandatory camps in Schools before Board Exams."
-
-def get_measure_funnel():
-    return "🔻 **Retention Strategy**: \n**Action**: High drop-off from Enrolment to Update suggests citizens forget Mandatory Biometric Updates (MBU). \n**Measure**: Send SMS alerts to parents when child turns 5 and 15."
-
-def get_measure_trend():
-    return "📈 **Capacity Planning**: \n**Action**: Correlate peaks with harvest or school admission seasons. Pre-book additional hardware for these months to avoid queues."
-
-def get_measure_area():
-    return "🌊 **Composition Policy**: \n**Action**: As the 'Adult' band shrinks in new enrolments, re-train operators from 'Enrolment' to 'Update/Correction' specialists."
-
-def get_measure_scatter():
-    return "💠 **Growth Zones**: \n**Action**: **Sleeping Giants** (High Pop, Low Growth) need political intervention/Chief Secretary review. **Fast Movers** need more kits."
-
-def get_measure_demo_trend():
-    return "📉 **Update Compliance**: \n**Action**: Vertical spikes in address updates often precede local elections. Ensure strict document verification (FOV) during these times to prevent voter fraud."
+from aadhaar_analytics.utils import constants, partitions
+from aadhaar_analytics.utils.lru import LRUCache
+from aadhaar_analytics.utils.warmup import Warmup
+from aadhaar_analytics.dashboard.measures import (
+    get_measure_gauge, get_measure_bullet, get_measure_map, get_measure_bar,
+    get_measure_tree, get_measure_pie, get_measure_funnel, get_measure_trend,
+    get_measure_area, get_measure_scatter, get_measure_demo_trend, get_measure_outliers,
+    get_measure_bio_trend
+)
 
-def get_measure_outliers():
-    return "📦 **Fraud Prevention**: \n**Action**: Districts flagged as outliers must undergo **100% Packet Audit** for the next 30 days. Suspend rogue operators immediately."
+logger = logging.getLogger(__name__)
 
-def get_measure_bio_trend():
-    return "🧬 **Biometric Security**: \n**Action**: If biometric updates are low, banking auth failures will rise. \n**Measure**: Partner with Banks to set up Iris Scanners at branches for localized updates."
+# Plotting and AI modules are imported on first use (and pre-imported by the
+# background loader), so the server can come up before they are loaded.
+HEAVY_MODULES = ["plotly.express", "aadhaar_analytics.visualization.charts", "aadhaar_analytics.ai.gemini_service"]
 
 # --- STATIC ANALYSIS HELPERS ---
 def analyze_kpi_health(kpis):
@@ -96,45 +69,102 @@ def analyze_demographic_anomalies(ratio_display):
     return analysis
 
 # --- DATA LOADING ---
-print("Loading Datasets...")
-raw_data = loader.load_all_datasets()
-df_enr_all = cleaning.clean_dataframe(raw_data.get('enrolment', pd.DataFrame()), 'enrolment')
-df_enr_all = feature_engineering.add_time_features(df_enr_all)
-
-df_demo_all = cleaning.clean_dataframe(raw_data.get('demographic', pd.DataFrame()), 'demographic')
-df_demo_all = feature_engineering.add_time_features(df_demo_all)
-
-df_bio_all = cleaning.clean_dataframe(raw_data.get('biometric', pd.DataFrame()), 'biometric')
-df_bio_all = feature_engineering.add_time_features(df_bio_all)
-print("Data Loaded.")
-
-# Load GeoJSON
-geojson_path = os.path.join(os.path.dirname(__file__), '../data/geo/india_states.geojson')
+# Data loads on a background thread so the server can answer immediately;
+# these globals are filled in by load_data() before DATA_READY is set.
+CUBE = None
+DATA_VERSION = None
 india_geojson = None
-if os.path.exists(geojson_path):
-    with open(geojson_path, 'r') as f:
-        india_geojson = json.load(f)
-
-# Helper to get states
-all_states = set()
-if not df_enr_all.empty and constants.COL_STATE in df_enr_all.columns:
-    all_states.update(df_enr_all[constants.COL_STATE].dropna().unique().tolist())
-all_states = sorted(list(all_states))
-
-def filter_data(selected_state):
-    if selected_state == "All":
-        return df_enr_all, df_demo_all, df_bio_all
-    
-    e = df_enr_all[df_enr_all[constants.COL_STATE] == selected_state] if not df_enr_all.empty else df_enr_all
-    d = df_demo_all[df_demo_all[constants.COL_STATE] == selected_state] if not df_demo_all.empty else df_demo_all
-    b = df_bio_all[df_bio_all[constants.COL_STATE] == selected_state] if not df_bio_all.empty else df_bio_all
-    return e, d, b
-
-def update_overview(selected_state, api_key):
-    df_e, df_d, df_b = filter_data(selected_state)
+all_states = []
+min_date = max_date = None
+LOAD_ERROR = None
+DATA_READY = threading.Event()
+SERVER_UP = threading.Event()
+WARMUP = None
+
+def log_if_ready():
+    """Logs the full-ready time once both the server and the data are up."""
+    if SERVER_UP.is_set() and DATA_READY.is_set() and not getattr(log_if_ready, "done", False):
+        log_if_ready.done = True
+        logger.info(f"Dashboard fully ready {time.time() - STARTED_AT:.2f}s after start.")
+
+def load_data():
+    """Loads the processed datasets, cube and GeoJSON, then starts the view warm-up."""
+    global CUBE, DATA_VERSION, india_geojson, all_states, min_date, max_date, LOAD_ERROR, WARMUP
+    try:
+        logger.info("Loading Datasets...")
+        # Every tab is answered from one pre-aggregated cube (memory-mapped from the
+        # snapshot on restart), so the row-level frames are not kept around
+        _, CUBE = snapshot.load_state()
+        # Changes whenever the source shards (or the cleaning code) change
+        DATA_VERSION = cache.data_version()
+
+        # Load GeoJSON
+        geojson_path = os.path.join(os.path.dirname(__file__), '../data/geo/india_states.geojson')
+        if os.path.exists(geojson_path):
+            with open(geojson_path, 'r') as f:
+                india_geojson = json.load(f)
+
+        # Helper to get states
+        all_states = CUBE.by_state('enrolment')[constants.COL_STATE].tolist()
+
+        # Bounds for the date-range filter
+        min_date = CUBE.dates.min().strftime('%Y-%m-%d') if len(CUBE.dates) else None
+        max_date = CUBE.dates.max().strftime('%Y-%m-%d') if len(CUBE.dates) else None
+    except Exception as e:
+        LOAD_ERROR = e
+        logger.exception("Dashboard data failed to load.")
+        return
+    finally:
+        DATA_READY.set()
+    logger.info(f"Data Loaded {time.time() - STARTED_AT:.2f}s after start.")
+    log_if_ready()
+
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)
+    if constants.WARMUP_WORKERS > 0:
+        WARMUP = start_warmup()
+
+def wait_for_data():
+    """Blocks until the background load has finished; raises if it failed."""
+    DATA_READY.wait()
+    if LOAD_ERROR is not None:
+        raise gr.Error(f"Data failed to load: {LOAD_ERROR}")
+
+def filter_data(selected_state, start_date=None, end_date=None):
+    """
+    Returns the cube restricted to the selected state(s) and date range. States
+    are precomputed slices of the cube and dates are prefix-sum windows.
+    """
+    return CUBE.select(selected_state).window(start_date or None, end_date or None)
+
+# --- RESULT CACHE ---
+# Tab views keyed by (tab, state selection, date range, extra inputs such as
+# thresholds, data version). AI text is not part of a view, so views cached for
+# one user (or by the warm-up) serve everyone.
+RESULTS = LRUCache(constants.DASHBOARD_CACHE_SIZE)
+
+def view_key(tab, selected_state, start_date=None, end_date=None, *extra):
+    """Cache key of a tab view; equivalent selections and date ranges map to the same key."""
+    states = partitions.normalize_selection(selected_state)
+    # Bounds at or beyond the data's own range select everything
+    start = start_date if start_date and min_date and str(start_date) > min_date else None
+    end = end_date if end_date and max_date and str(end_date) < max_date else None
+    return (tab, tuple(sorted(states)) if states else "All", start, end) + extra + (DATA_VERSION,)
+
+def cached_view(tab, view, *args, force=False):
+    """Returns a tab view from the result cache, computing it on a miss (or when forced)."""
+    wait_for_data()
+    return RESULTS.get_or_compute(view_key(tab, *args), lambda: view(*args), force=force)
+
+# --- TAB VIEWS ---
+def overview_view(selected_state, start_date=None, end_date=None):
+    """Overview tab outputs (all but the AI insight), followed by the KPI dict."""
+    from aadhaar_analytics.visualization import charts
+    cube = filter_data(selected_state, start_date, end_date)
+    has_enr = cube.has('enrolment')
     
     # KPIs
-    kpis = feature_engineering.calculate_kpis(df_e, df_d, df_b)
+    kpis = cube.kpis()
     kpi_text = (
         f"### Total Enrolments: {kpis.get('total_enrolments', 0):,}\n"
         f"### Demographic Updates: {kpis.get('total_demo_updates', 0):,}\n"
@@ -158,9 +188,9 @@ def update_overview(selected_state, api_key):
     m_bullet = get_measure_bullet(avg_daily_enr, target_daily)
     
     # Bar Chart
-    desc_analytics = DescriptiveAnalytics(df_e, df_d, df_b)
+    desc_analytics = DescriptiveAnalytics(cube=cube)
     fig_bar = None
-    if not df_e.empty:
+    if has_enr:
         summary = desc_analytics.get_state_wise_summary('enrolment')
         if not summary.empty:
             summary['Total'] = summary.sum(axis=1, numeric_only=True)
@@ -170,9 +200,9 @@ def update_overview(selected_state, api_key):
         
     # Treemap
     fig_tree = None
-    if not df_e.empty:
+    if has_enr:
         cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
-        treemap_df = feature_engineering.aggregate_by_region(df_e, cols)
+        treemap_df = cube.by_region('enrolment')
         treemap_df['Total'] = treemap_df[cols].sum(axis=1)
         if len(treemap_df) > 1000:
             treemap_df = treemap_df.nlargest(1000, 'Total')
@@ -181,30 +211,27 @@ def update_overview(selected_state, api_key):
 
     # Geo Map (New)
     fig_map = None
-    if india_geojson and not df_e.empty:
-         map_df = df_e.groupby(constants.COL_STATE).size().reset_index(name='Total')
+    if india_geojson and has_enr:
+         map_df = cube.by_state('enrolment')
+         map_df['Total'] = map_df[constants.MEASURE_COLUMNS['enrolment']].sum(axis=1)
          fig_map = charts.plot_choropleth(map_df, india_geojson, constants.COL_STATE, 'Total', 'properties.ST_NM', "State-wise Enrolment Saturation")
     m_map = get_measure_map()
 
-    # AI Summary
-    ai_output = "🤖 **AI Analyst**: Enter an API Key to generate specific insights."
-    if api_key:
-        gemini = GeminiService(api_key)
-        try:
-            ai_output = gemini.explain_kpis(kpis, selected_state)
-        except Exception as e:
-            ai_output = f"Error: {e}"
-            
-    return kpi_text, static_analysis_text, fig_gauge, m_gauge, fig_bullet, m_bullet, fig_bar, m_bar, fig_tree, m_tree, fig_map, m_map, ai_output
+    return kpi_text, static_analysis_text, fig_gauge, m_gauge, fig_bullet, m_bullet, fig_bar, m_bar, fig_tree, m_tree, fig_map, m_map, kpis
 
-def update_enrolment(selected_state, api_key):
-    df_e, df_d, df_b = filter_data(selected_state)
-    desc_analytics = DescriptiveAnalytics(df_e, df_d, df_b)
+def enrolment_view(selected_state, start_date=None, end_date=None):
+    """Enrolment tab outputs (all but the AI trend analysis), followed by the trend frame."""
+    import plotly.express as px
+    from aadhaar_analytics.visualization import charts
+    cube = filter_data(selected_state, start_date, end_date)
+    has_enr = cube.has('enrolment')
+    desc_analytics = DescriptiveAnalytics(cube=cube)
     
     # Age Pie
     fig_pie = None
-    if not df_e.empty:
-        summary_age = df_e[[constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]].sum().reset_index()
+    if has_enr:
+        age_totals = cube.totals('enrolment')
+        summary_age = age_totals.reset_index()
         summary_age.columns = ['Age Group', 'Count']
         fig_pie = px.pie(summary_age, values='Count', names='Age Group', title="Enrolment Demographics (Age)", hole=0.4)
         fig_pie.update_layout(template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
@@ -212,11 +239,11 @@ def update_enrolment(selected_state, api_key):
         
     # Funnel
     fig_funnel = None
-    if not df_e.empty:
+    if has_enr:
         funnel_data = {
-            'Infant (0-5)': df_e[constants.COL_ENR_AGE_0_5].sum(),
-            'Youth (5-17)': df_e[constants.COL_ENR_AGE_5_17].sum(),
-            'Adult (18+)': df_e[constants.COL_ENR_AGE_18_PLUS].sum()
+            'Infant (0-5)': age_totals[constants.COL_ENR_AGE_0_5],
+            'Youth (5-17)': age_totals[constants.COL_ENR_AGE_5_17],
+            'Adult (18+)': age_totals[constants.COL_ENR_AGE_18_PLUS]
         }
         fig_funnel = charts.plot_funnel(funnel_data, "Lifecycle Funnel (Retention)")
     m_funnel = get_measure_funnel()
@@ -234,33 +261,25 @@ def update_enrolment(selected_state, api_key):
         
     # Scatter
     fig_scatter = None
-    if not df_e.empty:
-         state_agg = df_e.groupby(constants.COL_STATE).sum(numeric_only=True)
+    if has_enr:
+         state_agg = cube.by_state('enrolment').set_index(constants.COL_STATE)
          state_agg['Total'] = state_agg[constants.COL_ENR_AGE_0_5] + state_agg[constants.COL_ENR_AGE_5_17] + state_agg[constants.COL_ENR_AGE_18_PLUS]
          state_agg['Birth_Rate_Proxy'] = state_agg[constants.COL_ENR_AGE_0_5] / state_agg['Total']
          state_agg = state_agg.reset_index()
          fig_scatter = charts.plot_scatter(state_agg, 'Total', 'Birth_Rate_Proxy', size_col='Total', color_col=constants.COL_STATE, title="State Growth Matrix")
     m_scatter = get_measure_scatter()
-        
-    # AI Trend
-    ai_trend = "🤖 **AI Trend Hunter**: Waiting for inputs..."
-    if api_key and not trend_df.empty:
-        gemini = GeminiService(api_key)
-        try:
-            ai_trend = gemini.analyze_trends(trend_df, "Enrolment")
-        except Exception as e:
-            ai_trend = f"Error: {e}"
-            
-    return fig_pie, m_pie, fig_funnel, m_funnel, fig_trend, m_trend, fig_area, m_area, fig_scatter, m_scatter, ai_trend
 
-def update_demo(selected_state):
-    df_e, df_d, df_b = filter_data(selected_state)
-    desc_analytics = DescriptiveAnalytics(df_e, df_d, df_b)
-    diag_analytics = DiagnosticAnalytics(df_e, df_d, df_b)
+    return fig_pie, m_pie, fig_funnel, m_funnel, fig_trend, m_trend, fig_area, m_area, fig_scatter, m_scatter, trend_df
+
+def demo_view(selected_state, start_date=None, end_date=None):
+    from aadhaar_analytics.visualization import charts
+    cube = filter_data(selected_state, start_date, end_date)
+    desc_analytics = DescriptiveAnalytics(cube=cube)
+    diag_analytics = DiagnosticAnalytics(cube=cube)
     
     # Trend
     fig_trend = None
-    if not df_d.empty:
+    if cube.has('demographic'):
         trend_demo = desc_analytics.get_trend_analysis('demographic')
         if not trend_demo.empty:
              trend_melt = trend_demo.melt(id_vars=[constants.COL_DATE], var_name='Age Group', value_name='Count')
@@ -286,26 +305,28 @@ def update_demo(selected_state):
     
     return fig_trend, m_trend, ratio_display, static_analysis, fig_corr, fig_box, m_box
 
-def update_bio(selected_state):
-    df_e, df_d, df_b = filter_data(selected_state)
-    desc_analytics = DescriptiveAnalytics(df_e, df_d, df_b)
+def bio_view(selected_state, start_date=None, end_date=None):
+    import plotly.express as px
+    from aadhaar_analytics.visualization import charts
+    cube = filter_data(selected_state, start_date, end_date)
+    desc_analytics = DescriptiveAnalytics(cube=cube)
     
     fig_trend = None
     fig_bar = None
     
-    if not df_b.empty:
+    if cube.has('biometric'):
          trend_bio = desc_analytics.get_trend_analysis('biometric')
          if not trend_bio.empty:
              trend_melt = trend_bio.melt(id_vars=[constants.COL_DATE], var_name='Age Group', value_name='Count')
              fig_trend = charts.plot_trend(trend_melt, "Biometric Updates Trend", x_col=constants.COL_DATE, y_col='Count', color_col='Age Group')
          
-         if selected_state != "All":
-             agg_bio = feature_engineering.aggregate_by_region(df_b, [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS])
+         if partitions.normalize_selection(selected_state) is not None:
+             agg_bio = cube.by_region('biometric')
              agg_bio['Total'] = agg_bio[constants.COL_BIO_AGE_5_17] + agg_bio[constants.COL_BIO_AGE_18_PLUS]
-             fig_bar = px.bar(agg_bio.sort_values('Total', ascending=False).head(20), x=constants.COL_DISTRICT, y='Total', title=f"Top High-Traffic Districts in {selected_state}")
+             fig_bar = px.bar(agg_bio.sort_values('Total', ascending=False).head(20), x=constants.COL_DISTRICT, y='Total', title=f"Top High-Traffic Districts in {partitions.selection_label(selected_state)}")
              fig_bar.update_layout(template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
          else:
-             agg_bio = df_b.groupby(constants.COL_STATE)[['bio_age_5_17', 'bio_age_17_']].sum().reset_index()
+             agg_bio = cube.by_state('biometric')
              agg_bio['Total'] = agg_bio['bio_age_5_17'] + agg_bio['bio_age_17_']
              fig_bar = px.bar(agg_bio.sort_values('Total', ascending=False).head(20), x=constants.COL_STATE, y='Total', title="Top High-Traffic States for Biometrics")
              fig_bar.update_layout(template="plotly_dark", paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
@@ -313,9 +334,9 @@ def update_bio(selected_state):
     m_trend = get_measure_bio_trend()
     return fig_trend, m_trend, fig_bar
 
-def update_pred(selected_state):
-    df_e, df_d, df_b = filter_data(selected_state)
-    pred_analytics = PredictiveAnalytics(df_e, df_b)
+def pred_view(selected_state, start_date=None, end_date=None):
+    from aadhaar_analytics.visualization import charts
+    pred_analytics = PredictiveAnalytics(cube=filter_data(selected_state, start_date, end_date))
     
     forecast_enr = pred_analytics.forecast_enrolment_demand()
     fig_enr = charts.plot_trend(forecast_enr, "Enrolment Demand Forecast (3 Months)", x_col='date', y_col='forecast', color_col='type') if not forecast_enr.empty else None
@@ -330,25 +351,137 @@ def update_pred(selected_state):
     """
     return fig_enr, fig_bio, analysis
 
-def update_recs(selected_state, th_enr, th_bio, api_key):
-    df_e, df_d, df_b = filter_data(selected_state)
-    presc_analytics = PrescriptiveAnalytics(df_e, df_b)
+def recs_view(selected_state, start_date, end_date, th_enr, th_bio):
+    presc_analytics = PrescriptiveAnalytics(cube=filter_data(selected_state, start_date, end_date))
     
     recs = presc_analytics.get_recommendations(threshold_enr=th_enr, threshold_bio=th_bio)
-    policy_text = "Policy Draft (Enter API Key)"
-    if api_key and not recs.empty:
-        gemini = GeminiService(api_key)
-        try:
-            policy_text = gemini.recommend_policy(recs)
-        except:
-            policy_text = "Policy generation failed."
     
     logic_expl = f"""
     ### 🧠 Recommendation Engine Logic
     **Thresholds Applied**: Enrolment > `{th_enr}`, Biometric > `{th_bio}`.
     **Logic**: IF Load > Threshold AND Trend Rising -> **"Mobilize Van"**.
     """
-    return recs, policy_text, logic_expl
+    return recs, logic_expl
+
+# --- TAB HANDLERS ---
+# Views come from the result cache; AI insights are added per request. Handlers
+# that show AI text are generators: the charts go out first, then the AI text
+# streams into its panel (other outputs are skipped on those updates).
+def stream_ai(outputs, api_key, prompt, fallback, waiting):
+    """Yields the view outputs with `waiting`, then with the AI text as it arrives."""
+    from aadhaar_analytics.ai.gemini_service import GeminiService
+    yield (*outputs, waiting)
+    skip = (gr.skip(),) * len(outputs)
+    for text in GeminiService(api_key).stream_response(prompt, fallback=fallback):
+        yield (*skip, text)
+
+def update_overview(selected_state, start_date, end_date, api_key, force=False):
+    *outputs, kpis = cached_view("overview", overview_view, selected_state, start_date, end_date, force=force)
+
+    # AI Summary
+    if not (api_key or constants.AI_OFFLINE):
+        yield (*outputs, "🤖 **AI Analyst**: Enter an API Key to generate specific insights.")
+        return
+    from aadhaar_analytics.ai.gemini_service import GeminiService
+    prompt = GeminiService.kpi_prompt(kpis, partitions.selection_label(selected_state))
+    # outputs[3] is the gauge measure
+    yield from stream_ai(outputs, api_key, prompt, outputs[3], "🤖 **AI Analyst**: Generating insights...")
+
+def update_enrolment(selected_state, start_date, end_date, api_key, force=False):
+    *outputs, trend_df = cached_view("enrolment", enrolment_view, selected_state, start_date, end_date, force=force)
+
+    # AI Trend
+    if not (api_key or constants.AI_OFFLINE) or trend_df.empty:
+        yield (*outputs, "🤖 **AI Trend Hunter**: Waiting for inputs...")
+        return
+    from aadhaar_analytics.ai.gemini_service import GeminiService
+    prompt = GeminiService.trend_prompt(trend_df, "Enrolment")
+    yield from stream_ai(outputs, api_key, prompt, get_measure_trend(), "🤖 **AI Trend Hunter**: Detecting patterns...")
+
+def update_demo(selected_state, start_date, end_date, force=False):
+    return cached_view("demo", demo_view, selected_state, start_date, end_date, force=force)
+
+def update_bio(selected_state, start_date, end_date, force=False):
+    return cached_view("bio", bio_view, selected_state, start_date, end_date, force=force)
+
+def update_pred(selected_state, start_date, end_date, force=False):
+    return cached_view("pred", pred_view, selected_state, start_date, end_date, force=force)
+
+def update_recs(selected_state, start_date, end_date, th_enr, th_bio, api_key):
+    recs, logic_expl = cached_view("recs", recs_view, selected_state, start_date, end_date, th_enr, th_bio)
+
+    if not (api_key or constants.AI_OFFLINE) or recs.empty:
+        yield recs, "Policy Draft (Enter API Key)", logic_expl
+        return
+    from aadhaar_analytics.ai.gemini_service import GeminiService
+    prompt = GeminiService.policy_prompt(recs)
+    for table, logic, policy_text in stream_ai((recs, logic_expl), api_key, prompt, get_measure_outliers(), "Drafting directive..."):
+        yield table, policy_text, logic
+
+def tab_updates(result):
+    """The output updates of a handler, which either returns them or yields several."""
+    return result if inspect.isgenerator(result) else (result,)
+
+def open_tab(tab, handler):
+    """Tab-select handler: marks the tab visible and fills it (from cache when possible)."""
+    def run(*args):
+        for outputs in tab_updates(handler(*args)):
+            yield (tab,) + tuple(outputs)
+    return run
+
+def refresh_tab(tab, handler, n_outputs, force=False):
+    """Input-change handler: recomputes only the visible tab, others wait until selected."""
+    def run(active_tab, *args):
+        if active_tab != tab:
+            yield (gr.skip(),) * n_outputs
+            return
+        yield from tab_updates(handler(*args, force=force))
+    return run
+
+# --- BACKGROUND WARM-UP ---
+# Every state's tab views are precomputed into the result cache after load,
+# busiest states first, so handlers find them ready.
+WARM_VIEWS = [("overview", overview_view), ("enrolment", enrolment_view), ("demo", demo_view),
+              ("bio", bio_view), ("pred", pred_view)]
+
+def warmup_states():
+    """"All" plus states by total volume across datasets, as many as the result cache holds."""
+    volume = pd.Series(dtype='int64')
+    for dataset_type in AggregateCube.DATASETS:
+        by_state = CUBE.by_state(dataset_type).set_index(constants.COL_STATE)
+        volume = volume.add(by_state.sum(axis=1), fill_value=0)
+    capacity = RESULTS.maxsize // len(WARM_VIEWS) - 1
+    return ["All"] + volume.sort_values(ascending=False).index.tolist()[:max(0, capacity)]
+
+def start_warmup():
+    tasks = [(f"{tab}/{state}", partial(cached_view, tab, view, state))
+             for state in warmup_states() for tab, view in WARM_VIEWS]
+    return Warmup(tasks, workers=constants.WARMUP_WORKERS, name="View warm-up").start()
+
+def warmup_status():
+    """Sidebar readiness text, and the status timer (stopped once warm-up is over)."""
+    if not DATA_READY.is_set():
+        return "**Views**: ⏳ Loading data...", gr.Timer(active=True)
+    if LOAD_ERROR is not None:
+        return "**Views**: ❌ Data failed to load", gr.Timer(active=False)
+    if WARMUP is None:
+        return "**Views**: computed on demand", gr.Timer(active=False)
+    if WARMUP.is_done:
+        return f"**Views**: ✅ {WARMUP.total} precomputed", gr.Timer(active=False)
+    return f"**Views**: ⏳ Warming up {WARMUP.progress():.0%} ({WARMUP.done}/{WARMUP.total})", gr.Timer(active=True)
+
+def setup_filters():
+    """Fills the region choices and date bounds once the data has loaded."""
+    wait_for_data()
+    return gr.Dropdown(choices=all_states), min_date, max_date
+
+def launch(**kwargs):
+    """Starts the server without waiting for the data, logging when it accepts requests."""
+    app.launch(prevent_thread_lock=True, **kwargs)
+    logger.info(f"Server accepting requests {time.time() - STARTED_AT:.2f}s after start (time to first byte).")
+    SERVER_UP.set()
+    log_if_ready()
+    app.block_thread()
 
 # --- CSS Styling ---
 custom_css = """
@@ -426,19 +559,29 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
     
     with gr.Sidebar(open=True, label="🎛️ Control Panel"):
         gr.Markdown("### ⚙️ Settings")
-        state_input = gr.Dropdown(["All"] + all_states, label="🌍 Select Region", value="All", elem_id="state_select", interactive=True)
+        # Choices arrive with the data (setup_filters); custom values keep API calls valid before then
+        # No selection means all regions (this Dropdown has no placeholder, hence the info line)
+        state_input = gr.Dropdown([], label="🌍 Select Region(s)", value=[], info="Empty = All", multiselect=True, allow_custom_value=True, elem_id="state_select", interactive=True)
+        with gr.Row():
+            date_from = gr.DateTime(None, include_time=False, type="string", label="📅 From")
+            date_to = gr.DateTime(None, include_time=False, type="string", label="📅 To")
         api_key_input = gr.Textbox(label="🔑 Gemini API Key", type="password", placeholder="sk-...", info="For AI Insights")
         refresh_btn = gr.Button("🔄 Refresh Data", variant="primary")
         
         gr.Markdown("---")
         gr.Markdown("**System Status**: ✅ Online\n**Version**: v3.2.0")
+        warmup_md = gr.Markdown("**Views**: ⏳ Loading data...")
+        warmup_timer = gr.Timer(1.0)
+
+    # Tab currently on screen; only it is recomputed when the filters change
+    active_tab = gr.State("overview")
 
     with gr.Column(elem_classes="contain"):
         gr.Markdown("# 🇮🇳 INDIA UIDAI Aadhaar Analytics Dashboard\n### Policy-Grade Decision Support System")
 
         with gr.Tabs():
             # TAB 1: OVERVIEW
-            with gr.TabItem("📊 Overview"):
+            with gr.TabItem("📊 Overview") as tab_overview:
                 with gr.Row():
                     with gr.Column(scale=2):
                         kpi_overview = gr.Markdown("Loading KPIs...")
@@ -469,14 +612,9 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
                     m_tree = gr.Markdown("Loading Measure...")
                 
                 ai_summary = gr.Markdown("### 🤖 AI Insight: Waiting for Key...")
-                
-                # Auto-Load
-                app.load(update_overview, [state_input, api_key_input], [kpi_overview, static_analysis_mkdn, gauge_plot, m_gauge, bullet_plot, m_bullet, bar_plot, m_bar, tree_plot, m_tree, map_plot, m_map, ai_summary])
-                refresh_btn.click(update_overview, [state_input, api_key_input], [kpi_overview, static_analysis_mkdn, gauge_plot, m_gauge, bullet_plot, m_bullet, bar_plot, m_bar, tree_plot, m_tree, map_plot, m_map, ai_summary])
-                state_input.change(update_overview, [state_input, api_key_input], [kpi_overview, static_analysis_mkdn, gauge_plot, m_gauge, bullet_plot, m_bullet, bar_plot, m_bar, tree_plot, m_tree, map_plot, m_map, ai_summary])
 
             # TAB 2: ENROLMENT
-            with gr.TabItem("📝 Enrolment"):
+            with gr.TabItem("📝 Enrolment") as tab_enrolment:
                 gr.Markdown("### Lifecycle & Growth Analytics")
                 with gr.Column():
                     gr.Markdown("### 🍰 Demographic Composition (Pie)")
@@ -501,14 +639,9 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
                 m_scatter = gr.Markdown("Loading Measure...")
                 
                 ai_trend_text = gr.Markdown("Waiting...")
-                
-                # Auto-Load
-                app.load(update_enrolment, [state_input, api_key_input], [pie_plot, m_pie, funnel_plot, m_funnel, trend_plot, m_trend, area_plot, m_area, scatter_plot, m_scatter, ai_trend_text])
-                refresh_btn.click(update_enrolment, [state_input, api_key_input], [pie_plot, m_pie, funnel_plot, m_funnel, trend_plot, m_trend, area_plot, m_area, scatter_plot, m_scatter, ai_trend_text])
-                state_input.change(update_enrolment, [state_input, api_key_input], [pie_plot, m_pie, funnel_plot, m_funnel, trend_plot, m_trend, area_plot, m_area, scatter_plot, m_scatter, ai_trend_text])
 
             # TAB 3: DEMOGRAPHIC
-            with gr.TabItem("🔄 Demographic"):
+            with gr.TabItem("🔄 Demographic") as tab_demo:
                 gr.Markdown("### Update Behavior & Anomalies")
                 gr.Markdown("### 📉 Update Frequency Trend")
                 demo_trend_plot = gr.Plot(label="Trend")
@@ -526,14 +659,9 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
                     gr.Markdown("### 📦 Outlier Detection (Box Plot)")
                     box_plot = gr.Plot(label="Box")
                     m_box = gr.Markdown("Loading Measure...")
-                
-                # Auto-Load
-                app.load(update_demo, [state_input], [demo_trend_plot, m_trend_demo, ratio_table, demo_analysis_mkdn, corr_plot, box_plot, m_box])
-                refresh_btn.click(update_demo, [state_input], [demo_trend_plot, m_trend_demo, ratio_table, demo_analysis_mkdn, corr_plot, box_plot, m_box])
-                state_input.change(update_demo, [state_input], [demo_trend_plot, m_trend_demo, ratio_table, demo_analysis_mkdn, corr_plot, box_plot, m_box])
 
             # TAB 4: BIOMETRIC
-            with gr.TabItem("Fingerprint/Iris"):
+            with gr.TabItem("Fingerprint/Iris") as tab_bio:
                 gr.Markdown("### Biometric Update Tracking")
                 with gr.Column():
                     gr.Markdown("### 📉 Biometric Trends")
@@ -542,14 +670,9 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
                     
                     gr.Markdown("### 📍 Geographic Hotspots (Bar)")
                     bio_dist_plot = gr.Plot(label="Hotspots")
-                
-                # Auto-Load
-                app.load(update_bio, [state_input], [bio_trend_plot, m_bio_trend, bio_dist_plot])
-                refresh_btn.click(update_bio, [state_input], [bio_trend_plot, m_bio_trend, bio_dist_plot])
-                state_input.change(update_bio, [state_input], [bio_trend_plot, m_bio_trend, bio_dist_plot])
 
             # TAB 5: PREDICTIONS
-            with gr.TabItem("🔮 Predictions"):
+            with gr.TabItem("🔮 Predictions") as tab_pred:
                 gr.Markdown("### AI-Driven Forecasts")
                 with gr.Column():
                     gr.Markdown("### 🔮 Enrolment Demand Forecast (3 Months)")
@@ -557,13 +680,9 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
                     gr.Markdown("### 🔮 Biometric Load Forecast (3 Months)")
                     pred_bio_plot = gr.Plot(label="Biometric Forecast")
                 pred_analysis_mkdn = gr.Markdown("### Static Analysis")
-                
-                app.load(update_pred, [state_input], [pred_enr_plot, pred_bio_plot, pred_analysis_mkdn])
-                refresh_btn.click(update_pred, [state_input], [pred_enr_plot, pred_bio_plot, pred_analysis_mkdn])
-                state_input.change(update_pred, [state_input], [pred_enr_plot, pred_bio_plot, pred_analysis_mkdn])
             
             # TAB 6: ACTIONS
-            with gr.TabItem("✅ Actions"):
+            with gr.TabItem("✅ Actions") as tab_recs:
                 gr.Markdown("### Prescriptive Intelligence Engine")
                 with gr.Column():
                     with gr.Column():
@@ -576,7 +695,44 @@ with gr.Blocks(theme=theme, title="UIDAI Aadhaar Analytics 3.0", css=custom_css)
                     recs_table = gr.Dataframe(label="Action Zones")
                     policy_output = gr.Textbox(label="Draft Directive", lines=15)
                 rec_btn = gr.Button("🚀 Generate Action Plan", variant="primary")
-                rec_btn.click(update_recs, [state_input, th_enr_sl, th_bio_sl, api_key_input], [recs_table, policy_output, rec_logic_mkdn])
+                rec_btn.click(update_recs, [state_input, date_from, date_to, th_enr_sl, th_bio_sl, api_key_input], [recs_table, policy_output, rec_logic_mkdn], api_name="recs")
+
+    # --- Wiring ---
+    # A tab is computed when it is selected; filter changes recompute only the
+    # visible tab and the refresh button recomputes it bypassing the cache.
+    filters = [state_input, date_from, date_to]
+    lazy_tabs = [
+        ("overview", tab_overview, update_overview, filters + [api_key_input],
+         [kpi_overview, static_analysis_mkdn, gauge_plot, m_gauge, bullet_plot, m_bullet, bar_plot, m_bar, tree_plot, m_tree, map_plot, m_map, ai_summary]),
+        ("enrolment", tab_enrolment, update_enrolment, filters + [api_key_input],
+         [pie_plot, m_pie, funnel_plot, m_funnel, trend_plot, m_trend, area_plot, m_area, scatter_plot, m_scatter, ai_trend_text]),
+        ("demo", tab_demo, update_demo, filters,
+         [demo_trend_plot, m_trend_demo, ratio_table, demo_analysis_mkdn, corr_plot, box_plot, m_box]),
+        ("bio", tab_bio, update_bio, filters, [bio_trend_plot, m_bio_trend, bio_dist_plot]),
+        ("pred", tab_pred, update_pred, filters, [pred_enr_plot, pred_bio_plot, pred_analysis_mkdn]),
+    ]
+    for tab, item, handler, inputs, outputs in lazy_tabs:
+        item.select(open_tab(tab, handler), inputs, [active_tab] + outputs, api_name=tab)
+        for control in filters:
+            control.change(refresh_tab(tab, handler, len(outputs)), [active_tab] + inputs, outputs, api_visibility="private")
+        refresh_btn.click(refresh_tab(tab, handler, len(outputs), force=True), [active_tab] + inputs, outputs, api_visibility="private")
+    # The action plan is generated on demand by its button
+    tab_recs.select(lambda: "recs", None, active_tab, api_visibility="private")
+
+    # Warm-up progress in the sidebar
+    warmup_timer.tick(warmup_status, None, [warmup_md, warmup_timer], show_progress="hidden", api_visibility="private")
+    app.load(warmup_status, None, [warmup_md, warmup_timer], show_progress="hidden", api_visibility="private")
+
+    # Region choices and date bounds are known once the data has loaded
+    app.load(setup_filters, None, [state_input, date_from, date_to], api_visibility="private")
+
+    # First paint: the overview tab is visible on load
+    app.load(open_tab("overview", update_overview), filters + [api_key_input],
+             [active_tab, kpi_overview, static_analysis_mkdn, gauge_plot, m_gauge, bullet_plot, m_bullet, bar_plot, m_bar, tree_plot, m_tree, map_plot, m_map, ai_summary],
+             api_visibility="private")
+
+# Start loading as soon as the module is imported; the UI above does not need the data
+threading.Thread(target=load_data, name="data-loader", daemon=True).start()
 
 if __name__ == "__main__":
-    app.launch()
+    launch()
@@ -0,0 +1,46 @@
+
+# Static policy measures shown under each chart; also the fallback text of the
+# AI panels when the model is slow or unavailable.
+
+def get_measure_gauge(ratio):
+    if ratio < 30:
+        return "🇮🇳 **Strategic Measure**: ecosystem is in **Acquisition Mode**. \n**Action**: State Govt must deploy 'Mobile Aadhaar Vans' to uncovered Gram Panchayats immediately to boost enrolment numbers."
+    return "🇮🇳 **Strategic Measure**: ecosystem is in **Maintenance Mode**. \n**Action**: Shift focus to **Data Hygiene**. Launch awareness campaigns for residents to update their POI/POA documents online."
+
+def get_measure_bullet(val, target):
+    if val < target:
+        return "⚠️ **Correction Required**: Daily targets missed. \n**Action**: Regional Offices (RO) must review operator attendance and machine uptime. Consider incentives for operators working on weekends."
+    return "✅ **On Track**: Targets met. \n**Action**: Maintain momentum. Conduct random quality audits to ensure speed isn't compromising data quality."
+
+def get_measure_map():
+    return "🗺️ **Regional Strategy**: \n**Action**: For 'Low Saturation' states (Lighter), integrate Aadhaar Enrolment with PDS (Ration) shops. For 'High Saturation' states (Darker), focus on Biometric Update Centers."
+
+def get_measure_bar():
+    return "📊 **Volume Management**: \n**Action**: Top 3 states require dedicated 'Server Lanes' in the CIDR backend to prevent latency during peak hours."
+
+def get_measure_tree():
+    return "🌳 **Demographic targeting**: \n**Action**: If 0-5 age group is small in any district, District Magistrates should mandate 'Aadhaar Camps' in Anganwadis and Maternity Wards."
+
+def get_measure_pie():
+    return "🍰 **Lifecycle Policy**: \n**Action**: **Baal Aadhaar (0-5)** requires 100% linkage with Birth Certificates. **Youth (5-17)** requires mandatory camps in Schools before Board Exams."
+
+def get_measure_funnel():
+    return "🔻 **Retention Strategy**: \n**Action**: High drop-off from Enrolment to Update suggests citizens forget Mandatory Biometric Updates (MBU). \n**Measure**: Send SMS alerts to parents when child turns 5 and 15."
+
+def get_measure_trend():
+    return "📈 **Capacity Planning**: \n**Action**: Correlate peaks with harvest or school admission seasons. Pre-book additional hardware for these months to avoid queues."
+
+def get_measure_area():
+    return "🌊 **Composition Policy**: \n**Action**: As the 'Adult' band shrinks in new enrolments, re-train operators from 'Enrolment' to 'Update/Correction' specialists."
+
+def get_measure_scatter():
+    return "💠 **Growth Zones**: \n**Action**: **Sleeping Giants** (High Pop, Low Growth) need political intervention/Chief Secretary review. **Fast Movers** need more kits."
+
+def get_measure_demo_trend():
+    return "📉 **Update Compliance**: \n**Action**: Vertical spikes in address updates often precede local elections. Ensure strict document verification (FOV) during these times to prevent voter fraud."
+
+def get_measure_outliers():
+    return "📦 **Fraud Prevention**: \n**Action**: Districts flagged as outliers must undergo **100% Packet Audit** for the next 30 days. Suspend rogue operators immediately."
+
+def get_measure_bio_trend():
+    return "🧬 **Biometric Security**: \n**Action**: If biometric updates are low, banking auth failures will rise. \n**Measure**: Partner with Banks to set up Iris Scanners at branches for localized updates."
@@ -0,0 +1,176 @@
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from aadhaar_analytics.ingestion import loader
+from aadhaar_analytics.preprocessing import cleaning, feature_engineering
+from aadhaar_analytics.utils import constants, columnar
+
+logger = logging.getLogger(__name__)
+
+# Cache layout under constants.CACHE_DIR:
+#   <dataset_type>/shards/<shard fingerprint>/  cleaned aggregate of one CSV shard
+#   <dataset_type>/store/                       cleaned + feature-engineered dataset
+#   <dataset_type>/manifest.json                shards folded into the store
+# Refreshes are incremental: new/changed shards are added to the store and the
+# cached aggregates of changed/deleted shards are subtracted back out of it.
+
+MANIFEST_FILE = "manifest.json"
+
+_CODE_VERSION = None
+
+# Settings in constants that shape the cleaned output (schemas, name aliases...)
+CLEANING_TABLES = ["DATASET_SCHEMAS", "MEASURE_COLUMNS", "OPTIONAL_COLUMNS", "AGGREGATE_GRAIN",
+                   "COL_RECORDS", "STATE_ALIASES", "DISTRICT_ALIASES", "UNKNOWN_DISTRICT"]
+
+def code_version():
+    """
+    Hash of the modules whose output is cached and of the constants tables
+    they clean with, so code or table edits invalidate entries.
+    """
+    global _CODE_VERSION
+    if _CODE_VERSION is None:
+        h = hashlib.sha1()
+        for module in (loader, cleaning, feature_engineering, columnar):
+            with open(module.__file__, "rb") as f:
+                h.update(f.read())
+        tables = {name: getattr(constants, name) for name in CLEANING_TABLES}
+        h.update(json.dumps(tables, sort_keys=True, default=str).encode("utf-8"))
+        _CODE_VERSION = h.hexdigest()[:12]
+    return _CODE_VERSION
+
+def shard_fingerprint(path, dataset_type):
+    """Fingerprint of a CSV shard: path, size, mtime and the cleaning code version."""
+    st = os.stat(path)
+    key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{dataset_type}|{code_version()}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+def _entry_dir(dataset_type, kind, fingerprint):
+    return os.path.join(constants.CACHE_DIR, dataset_type, kind, fingerprint)
+
+def _prune(dataset_type, kind, keep):
+    """Drops cache entries of one kind that are no longer referenced."""
+    root = os.path.join(constants.CACHE_DIR, dataset_type, kind)
+    if not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        if name not in keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+def _store(frame, path):
+    try:
+        columnar.save_frame(frame, path)
+    except OSError as e:
+        logger.warning(f"Could not write cache entry {path}: {e}")
+
+def load_shard(path, dataset_type, fingerprint=None):
+    """Returns the cleaned aggregate of one shard, from cache when it is current."""
+    fingerprint = fingerprint or shard_fingerprint(path, dataset_type)
+    entry = _entry_dir(dataset_type, "shards", fingerprint)
+    if columnar.frame_exists(entry):
+        return columnar.load_frame(entry)
+
+    df = loader.aggregate_csv_file(path, dataset_type)
+    _store(df, entry)
+    return df
+
+def _store_dir(dataset_type):
+    return os.path.join(constants.CACHE_DIR, dataset_type, "store")
+
+def read_manifest(dataset_type):
+    """Returns the shard manifest of a dataset, or None if there is no usable one."""
+    path = os.path.join(constants.CACHE_DIR, dataset_type, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("code_version") != code_version() or not columnar.frame_exists(_store_dir(dataset_type)):
+        return None
+    return manifest
+
+def _write_manifest(dataset_type, shards):
+    path = os.path.join(constants.CACHE_DIR, dataset_type, MANIFEST_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"code_version": code_version(), "shards": shards,
+                   "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=1)
+    os.replace(tmp, path)
+
+def _negate(df):
+    """Flips the sign of the summable columns so folding retracts the rows."""
+    return df.assign(**{c: -df[c] for c in loader.value_columns(df)})
+
+def _build_shards(dataset_type, shards, workers):
+    """Parses and caches the given {path: fingerprint} shards, in parallel if asked."""
+    workers = constants.INGEST_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(shards) or 1))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(load_shard, list(shards), [dataset_type] * len(shards), list(shards.values())))
+    return [load_shard(f, dataset_type, fp) for f, fp in shards.items()]
+
+def load_processed_dataset(dataset_type, workers=None, incremental=True):
+    """
+    Loads one dataset as a cleaned, feature-engineered frame at date x state x
+    district grain. Only shards that are new or changed since the last run are
+    parsed; with `incremental=False` the store is rebuilt from every shard.
+    """
+    if not constants.CACHE_ENABLED:
+        return feature_engineering.add_time_features(loader.load_dataset_aggregated(dataset_type, workers=workers))
+
+    csv_files = loader.get_dataset_files(dataset_type)
+    current = {os.path.abspath(f): shard_fingerprint(f, dataset_type) for f in csv_files}
+    manifest = read_manifest(dataset_type) if incremental else None
+    previous = manifest["shards"] if manifest else {}
+
+    if manifest and previous == current:
+        logger.info(f"Loaded {dataset_type} from cache ({len(current)} shards).")
+        return columnar.load_frame(_store_dir(dataset_type))
+
+    added = {f: fp for f, fp in current.items() if previous.get(f) != fp}
+    retracted = {f: fp for f, fp in previous.items() if current.get(f) != fp}
+
+    if manifest and all(columnar.frame_exists(_entry_dir(dataset_type, "shards", fp)) for fp in retracted.values()):
+        logger.info(f"Refreshing {dataset_type}: +{len(added)} shards, -{len(retracted)} shards...")
+        store = columnar.load_frame(_store_dir(dataset_type))
+        old_parts = [_negate(load_shard(f, dataset_type, fp)) for f, fp in retracted.items()]
+        df = loader.fold_aggregates([store] + _build_shards(dataset_type, added, workers) + old_parts)
+        if not df.empty:
+            # Drop keys whose every source row was retracted
+            df = df[df[constants.COL_RECORDS] > 0].reset_index(drop=True)
+            for c in (constants.COL_STATE, constants.COL_DISTRICT):
+                df[c] = df[c].cat.remove_unused_categories()
+    else:
+        logger.info(f"Rebuilding {dataset_type} from {len(current)} shards...")
+        df = loader.fold_aggregates(_build_shards(dataset_type, current, workers))
+
+    df = feature_engineering.add_time_features(df)
+    if current:
+        _store(df, _store_dir(dataset_type))
+        _write_manifest(dataset_type, current)
+        _prune(dataset_type, "shards", set(current.values()))
+    else:
+        shutil.rmtree(os.path.join(constants.CACHE_DIR, dataset_type), ignore_errors=True)
+    logger.info(f"Processed {dataset_type} dataset into {len(df)} rows.")
+    return df
+
+def load_processed_datasets(workers=None, incremental=True):
+    """Loads all three datasets through the cache."""
+    return {key: load_processed_dataset(key, workers=workers, incremental=incremental) for key in constants.DATASET_TYPES.keys()}
+
+def data_version():
+    """Short hash of the current source shards and processing code, for keying derived results."""
+    h = hashlib.sha1(code_version().encode("utf-8"))
+    for dataset_type in constants.DATASET_TYPES.keys():
+        for f in sorted(loader.get_dataset_files(dataset_type)):
+            h.update(shard_fingerprint(f, dataset_type).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+def clear_cache():
+    """Removes every cached entry."""
+    shutil.rmtree(constants.CACHE_DIR, ignore_errors=True)
@@ -2,7 +2,10 @@
 import os
 import glob
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pandas.api.types import union_categoricals
 from aadhaar_analytics.utils import constants
+from aadhaar_analytics.preprocessing import cleaning
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,11 +15,93 @@ def get_all_csv_files(directory):
     """Recursively find all CSV files in a directory."""
     return [y for x in os.walk(directory) for y in glob.glob(os.path.join(x[0], '*.csv'))]
 
-def load_dataset(dataset_type):
+def _normalize_column(name):
+    """Normalize Columns: strip whitespace, lowercase"""
+    return name.strip().lower()
+
+def schema_read_options(path, dataset_type):
     """
-    Loads all CSVs for a given dataset type (enrolment, demographic, biometric).
-    Returns a merged DataFrame.
+    Builds `usecols`/`dtype` arguments for pd.read_csv from the declared schema
+    of a dataset type, keyed by the shard's own (un-normalized) header names.
+    """
+    schema = constants.DATASET_SCHEMAS.get(dataset_type)
+    if not schema:
+        return {}
+
+    header = pd.read_csv(path, nrows=0).columns
+    raw_names = {_normalize_column(c): c for c in header}
+    missing = [c for c in schema if c not in raw_names and c not in constants.OPTIONAL_COLUMNS]
+    if missing:
+        logger.warning(f"File {path} is missing schema columns: {missing}")
+
+    present = [c for c in schema if c in raw_names]
+    return {
+        "usecols": [raw_names[c] for c in present],
+        "dtype": {raw_names[c]: schema[c] for c in present}
+    }
+
+def read_csv_file(path, dataset_type=None):
+    """
+    Reads a single CSV shard and normalizes its column names.
+    With a `dataset_type` the declared schema is applied while parsing;
+    shards that don't fit it are re-read with inferred dtypes.
+    Returns None (after logging) if the file can't be parsed.
+    """
+    try:
+        try:
+            df = pd.read_csv(path, **schema_read_options(path, dataset_type))
+        except (ValueError, TypeError) as e:
+            if not dataset_type:
+                raise
+            logger.warning(f"Typed read failed for {path} ({e}); falling back to inferred dtypes.")
+            df = pd.read_csv(path)
+        df.columns = [_normalize_column(c) for c in df.columns]
+        return df
+    except Exception as e:
+        logger.error(f"Error reading file {path}: {e}")
+        return None
+
+def _assemble_frames(dfs):
+    """
+    Stitches shard frames together one column at a time, popping each column
+    out of the shards as it is copied so peak memory stays near one full copy.
+    """
+    if len(dfs) == 1:
+        return dfs[0].reset_index(drop=True)
+
+    columns = list(dfs[0].columns)
+    if any(list(df.columns) != columns for df in dfs[1:]):
+        # Ragged shards: let pandas align the columns
+        return pd.concat(dfs, ignore_index=True)
+
+    out = {}
+    for c in columns:
+        parts = [df.pop(c) for df in dfs]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            out[c] = pd.Series(union_categoricals(parts, ignore_order=True), name=c)
+        else:
+            out[c] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(out, copy=False)
+
+def read_csv_files(csv_files, workers=None, dataset_type=None):
     """
+    Parses a list of CSV shards, on a process pool when `workers` > 1.
+    Shards come back in input order; unreadable ones are skipped.
+    """
+    workers = constants.INGEST_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(csv_files)))
+
+    if workers > 1:
+        logger.info(f"Parsing {len(csv_files)} files on {workers} workers...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            dfs = list(pool.map(read_csv_file, csv_files, [dataset_type] * len(csv_files)))
+    else:
+        dfs = [read_csv_file(f, dataset_type) for f in csv_files]
+
+    return [df for df in dfs if df is not None]
+
+def get_dataset_files(dataset_type):
+    """Returns the CSV shards for a dataset type (empty list if none are found)."""
     folder_name = constants.DATASET_TYPES.get(dataset_type)
     if not folder_name:
         raise ValueError(f"Unknown dataset type: {dataset_type}")
@@ -26,43 +111,158 @@ def load_dataset(dataset_type):
     
     if not os.path.exists(search_path):
         logger.error(f"Directory not found: {search_path}")
-        return pd.DataFrame() # Return empty if not found
+        return []
 
     csv_files = get_all_csv_files(search_path)
     if not csv_files:
         logger.warning(f"No CSV files found in {search_path}")
-        return pd.DataFrame()
+    return csv_files
+
+def load_dataset(dataset_type, workers=None):
+    """
+    Loads all CSVs for a given dataset type (enrolment, demographic, biometric).
+    `workers` > 1 parses the shards in parallel (defaults to constants.INGEST_WORKERS).
+    Returns a merged DataFrame of raw rows.
+    """
+    csv_files = get_dataset_files(dataset_type)
+    if not csv_files:
+        return pd.DataFrame() # Return empty if not found
 
     logger.info(f"Found {len(csv_files)} files for {dataset_type}...")
     
-    dfs = []
-    for f in csv_files:
-        try:
-            # Read CSV
-            df = pd.read_csv(f)
-            # Normalize Columns: strip whitespace, lowercase
-            df.columns = [c.strip().lower() for c in df.columns]
-            dfs.append(df)
-        except Exception as e:
-            logger.error(f"Error reading file {f}: {e}")
+    dfs = read_csv_files(csv_files, workers=workers, dataset_type=dataset_type)
 
     if not dfs:
         return pd.DataFrame()
 
-    final_df = pd.concat(dfs, ignore_index=True)
-    
-    # Memory Safety: Sample if too large
-    MAX_ROWS = 300000 
-    if len(final_df) > MAX_ROWS:
-        logger.warning(f"Dataset {dataset_type} is too large ({len(final_df)} rows). Sampling down to {MAX_ROWS}...")
-        final_df = final_df.sample(n=MAX_ROWS, random_state=42)
+    final_df = _assemble_frames(dfs)
         
     logger.info(f"Loaded {dataset_type} dataset with {len(final_df)} rows.")
     return final_df
 
-def load_all_datasets():
-    """Loads all three datasets."""
+# --- STREAMING AGGREGATION ---
+def iter_csv_chunks(path, chunksize=None, dataset_type=None):
+    """
+    Yields column-normalized chunks of a single CSV shard, typed by the declared
+    schema of `dataset_type` when given. If a chunk doesn't fit the schema the
+    rest of the shard is streamed with inferred dtypes.
+    """
+    chunksize = chunksize or constants.CHUNK_ROWS
+    rows_done = 0
+    try:
+        try:
+            with pd.read_csv(path, chunksize=chunksize, **schema_read_options(path, dataset_type)) as reader:
+                for chunk in reader:
+                    chunk.columns = [_normalize_column(c) for c in chunk.columns]
+                    rows_done += len(chunk)
+                    yield chunk
+            return
+        except (ValueError, TypeError) as e:
+            if not dataset_type:
+                raise
+            logger.warning(f"Typed read failed for {path} ({e}); streaming the rest with inferred dtypes.")
+
+        # Resume after the rows already yielded (line 0 is the header)
+        with pd.read_csv(path, chunksize=chunksize, skiprows=range(1, rows_done + 1)) as reader:
+            for chunk in reader:
+                chunk.columns = [_normalize_column(c) for c in chunk.columns]
+                yield chunk
+    except Exception as e:
+        logger.error(f"Error reading file {path}: {e}")
+
+def iter_dataset_chunks(dataset_type, chunksize=None):
+    """Yields raw chunks across every shard of a dataset type."""
+    for f in get_dataset_files(dataset_type):
+        yield from iter_csv_chunks(f, chunksize, dataset_type)
+
+def aggregate_chunk(df, dataset_type):
+    """Cleans a raw chunk and sums its measures at date x state x district grain."""
+    df = cleaning.clean_dataframe(df, dataset_type)
+    if df.empty or not all(c in df.columns for c in constants.AGGREGATE_GRAIN):
+        return pd.DataFrame()
+    measures = [c for c in constants.MEASURE_COLUMNS.get(dataset_type, []) if c in df.columns]
+    # Widen the compact uint32 counts so totals (and retractions) can't wrap
+    df = df.astype({c: 'int64' for c in measures})
+    grouped = df.groupby(constants.AGGREGATE_GRAIN, observed=True, sort=False)
+    out = grouped[measures].sum()
+    out[constants.COL_RECORDS] = grouped.size()
+    return out.reset_index()
+
+def value_columns(df):
+    """Summable columns of an aggregate frame (measures + record count)."""
+    summable = {c for cols in constants.MEASURE_COLUMNS.values() for c in cols}
+    summable.add(constants.COL_RECORDS)
+    return [c for c in df.columns if c in summable]
+
+def fold_aggregates(partials):
+    """
+    Merges partial aggregates into one frame, summing rows that share a grain key.
+    Only measure/record columns are kept; derived columns must be re-added.
+    """
+    partials = [p for p in partials if p is not None and not p.empty]
+    if not partials:
+        return pd.DataFrame()
+    merged = pd.concat(partials, ignore_index=True)
+    merged = merged.groupby(constants.AGGREGATE_GRAIN, observed=True)[value_columns(merged)].sum().reset_index()
+    merged[constants.COL_STATE] = merged[constants.COL_STATE].astype('category')
+    merged[constants.COL_DISTRICT] = merged[constants.COL_DISTRICT].astype('category')
+    return merged
+
+def aggregate_chunks(chunks, dataset_type):
+    """
+    Folds an iterable of raw chunks into exact running totals.
+    Memory is bounded by the number of distinct grain keys plus one chunk.
+    """
+    acc = pd.DataFrame()
+    pending = []
+    pending_rows = 0
+    for chunk in chunks:
+        part = aggregate_chunk(chunk, dataset_type)
+        pending.append(part)
+        pending_rows += len(part)
+        if pending_rows >= constants.CHUNK_ROWS:
+            acc = fold_aggregates([acc] + pending)
+            pending, pending_rows = [], 0
+    return fold_aggregates([acc] + pending)
+
+def aggregate_csv_file(path, dataset_type, chunksize=None):
+    """Streams one shard into its date x state x district aggregate."""
+    return aggregate_chunks(iter_csv_chunks(path, chunksize, dataset_type), dataset_type)
+
+def load_dataset_aggregated(dataset_type, chunksize=None, workers=None):
+    """
+    Streams every shard of a dataset type through the cleaner and returns exact
+    totals at date x state x district grain. Shards are aggregated in parallel
+    when `workers` > 1.
+    """
+    csv_files = get_dataset_files(dataset_type)
+    if not csv_files:
+        return pd.DataFrame()
+
+    logger.info(f"Found {len(csv_files)} files for {dataset_type} (streaming)...")
+
+    workers = constants.INGEST_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(csv_files)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(aggregate_csv_file, csv_files,
+                                     [dataset_type] * len(csv_files), [chunksize] * len(csv_files)))
+    else:
+        partials = [aggregate_csv_file(f, dataset_type, chunksize) for f in csv_files]
+
+    final_df = fold_aggregates(partials)
+    logger.info(f"Aggregated {dataset_type} dataset into {len(final_df)} rows.")
+    return final_df
+
+def load_all_datasets(workers=None, aggregate=False):
+    """
+    Loads all three datasets. With `aggregate=True` each one is streamed into
+    cleaned date x state x district totals instead of raw rows.
+    """
     data = {}
     for key in constants.DATASET_TYPES.keys():
-        data[key] = load_dataset(key)
+        if aggregate:
+            data[key] = load_dataset_aggregated(key, workers=workers)
+        else:
+            data[key] = load_dataset(key, workers=workers)
     return data
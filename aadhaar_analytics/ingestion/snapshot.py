@@ -0,0 +1,144 @@
+
+import os
+import json
+import time
+import shutil
+import uuid
+import hashlib
+import logging
+from aadhaar_analytics.ingestion import cache
+from aadhaar_analytics.analytics import cube as cube_module
+from aadhaar_analytics.analytics.cube import AggregateCube
+from aadhaar_analytics.utils import constants, columnar, partitions
+
+logger = logging.getLogger(__name__)
+
+# Snapshot layout under constants.SNAPSHOT_DIR:
+#   meta.json          version of the sources/code the snapshot was taken from
+#   frames/<dataset>/  processed frame per dataset, rows sorted by state
+#                      (columnar; categories stored once)
+#   cube/              AggregateCube arrays and prefix sums
+# Everything is `.npy`, so a restart maps the arrays back in instead of
+# re-reading the cache store and rebuilding the cube. Mapped pages are shared
+# read-only, so any number of dashboard workers mapping one snapshot hold a
+# single copy of the data between them (see publish/attach).
+
+SNAPSHOT_META = "meta.json"
+
+def snapshot_version():
+    """Hash of the current source shards and of the code whose output is snapshotted."""
+    h = hashlib.sha1(cache.data_version().encode("utf-8"))
+    with open(cube_module.__file__, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()[:12]
+
+def save_snapshot(frames, cube, path=None, version=None):
+    """
+    Writes the frames and cube to `path`. The old snapshot is renamed aside,
+    the new one renamed in and only then the old one removed, so readers see
+    the old or the new snapshot in full (or, between the renames, none).
+    """
+    path = path or constants.SNAPSHOT_DIR
+    tag = uuid.uuid4().hex[:8]
+    tmp, old = f"{path}.tmp-{tag}", f"{path}.old-{tag}"
+    try:
+        for dataset_type, df in frames.items():
+            # Pre-sorted, so StatePartitions can use the mapped frame without a copy
+            columnar.save_frame(partitions.StatePartitions(df).frame, os.path.join(tmp, "frames", dataset_type))
+        cube.save(os.path.join(tmp, "cube"))
+        with open(os.path.join(tmp, SNAPSHOT_META), "w", encoding="utf-8") as f:
+            json.dump({"version": version or snapshot_version(), "datasets": list(frames),
+                       "created_at": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=1)
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not write snapshot {path}: {e}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        if os.path.exists(old) and not os.path.exists(path):
+            os.replace(old, path)
+        return
+    # Readers that mapped the old arrays keep them after the unlink
+    shutil.rmtree(old, ignore_errors=True)
+
+def load_snapshot(path=None, mmap=True, version=None):
+    """
+    Returns (frames, cube) from a snapshot taken from the current sources, or
+    None if there is none, it is stale, or it was swapped out mid-read. With
+    `mmap=True` the numeric columns, category codes and cube arrays are mapped
+    read-only rather than read.
+    """
+    path = path or constants.SNAPSHOT_DIR
+    try:
+        with open(os.path.join(path, SNAPSHOT_META), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != (version or snapshot_version()):
+        return None
+
+    try:
+        frames = {k: columnar.load_frame(os.path.join(path, "frames", k), mmap=mmap) for k in meta["datasets"]}
+        return frames, AggregateCube.load(os.path.join(path, "cube"), mmap=mmap)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Could not read snapshot {path}: {e}")
+        return None
+
+def load_state(mmap=True):
+    """
+    Processed frames ({dataset_type: DataFrame}) and their AggregateCube, from
+    the snapshot when it is current, otherwise rebuilt and snapshotted.
+    """
+    if not constants.CACHE_ENABLED:
+        frames = cache.load_processed_datasets()
+        return frames, AggregateCube(frames.get('enrolment'), frames.get('demographic'), frames.get('biometric'))
+    if constants.SNAPSHOT_ATTACH:
+        state = attach(mmap=mmap)
+        if state is not None:
+            return state
+        logger.warning(f"No current snapshot published within {constants.SNAPSHOT_WAIT:.0f}s; loading locally.")
+
+    start = time.time()
+    version = snapshot_version()
+    state = load_snapshot(mmap=mmap, version=version)
+    if state is not None:
+        logger.info(f"Mapped snapshot in {time.time() - start:.2f}s.")
+        return state
+    logger.info("No current snapshot; building one.")
+    return publish(version=version)
+
+def publish(version=None):
+    """Loads the processed datasets, builds the cube and writes them as the snapshot."""
+    frames = cache.load_processed_datasets()
+    cube = AggregateCube(frames.get('enrolment'), frames.get('demographic'), frames.get('biometric'))
+    save_snapshot(frames, cube, version=version)
+    return frames, cube
+
+def attach(mmap=True, timeout=None, poll=1.0):
+    """
+    Maps the snapshot published by the loader process, waiting up to `timeout`
+    seconds (default SNAPSHOT_WAIT) for a current one. A snapshot that cannot
+    be read yet (being swapped in) counts as not yet published. Returns None
+    on timeout.
+    """
+    timeout = constants.SNAPSHOT_WAIT if timeout is None else timeout
+    deadline = time.time() + timeout
+    while True:
+        try:
+            state = load_snapshot(mmap=mmap)
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"Snapshot not readable yet: {e}")
+            state = None
+        if state is not None:
+            logger.info("Attached to published snapshot.")
+            return state
+        if time.time() >= deadline:
+            return None
+        time.sleep(poll)
+
+if __name__ == "__main__":
+    # Loader process for multi-worker deployments: publish the snapshot the
+    # workers (run with AADHAAR_SNAPSHOT_ATTACH=1) map read-only
+    start = time.time()
+    publish()
+    logger.info(f"Published snapshot to {constants.SNAPSHOT_DIR} in {time.time() - start:.2f}s.")
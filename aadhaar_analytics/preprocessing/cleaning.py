@@ -1,7 +1,69 @@
 
+import re
+import numpy as np
 import pandas as pd
 from aadhaar_analytics.utils import constants
 
+# Parsed dates shared across datasets and chunks: (format, raw value) -> Timestamp/NaT.
+# A dump only has a few hundred distinct dates, so this stays tiny.
+_DATE_CACHE = {}
+_DATE_CACHE_LIMIT = 100000
+
+def parse_dates(values, format='%d-%m-%Y'):
+    """
+    Parses a column of date strings by factorizing it and parsing only the
+    unique values, then mapping the results back through the codes.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+
+    if len(_DATE_CACHE) > _DATE_CACHE_LIMIT:
+        _DATE_CACHE.clear()
+    missing = [u for u in uniques if (format, u) not in _DATE_CACHE]
+    if missing:
+        parsed = pd.to_datetime(pd.Index(missing, dtype=object), format=format, errors='coerce')
+        _DATE_CACHE.update(zip([(format, u) for u in missing], parsed))
+
+    lookup = pd.DatetimeIndex([_DATE_CACHE[(format, u)] for u in uniques])
+    return pd.Series(lookup.take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index)
+
+def canonical_name(value, aliases=None):
+    """Normalizes one State/District name; returns None for junk values."""
+    name = re.sub(r'\s*&\s*', ' & ', ' '.join(str(value).split())).title()
+    name = name.replace(' & ', ' And ').rstrip('.')
+    if not any(ch.isalpha() for ch in name) or name in ('Nan', 'None'):
+        return None
+    return aliases.get(name, name) if aliases else name
+
+def normalize_names(values, aliases=None, missing=None):
+    """
+    Normalizes a State/District column on its distinct values only: factorize,
+    clean the small array of uniques, then remap the codes. Missing and junk
+    names become `missing` (NaN by default).
+    Returns a categorical Series.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+
+    names = [canonical_name(u, aliases) for u in uniques]
+    if missing is not None:
+        # The last entry holds the code of the placeholder
+        names = [n or missing for n in names] + [missing]
+    cleaned = pd.Categorical(names)
+    fill = -1 if missing is None else cleaned.codes[-1]
+    new_codes = np.full(len(codes), fill, dtype=cleaned.codes.dtype)
+    valid = codes >= 0
+    new_codes[valid] = cleaned.codes[codes[valid]]
+    out = pd.Categorical.from_codes(new_codes, categories=cleaned.categories)
+    return pd.Series(out.remove_unused_categories() if missing is not None else out, index=values.index)
+
 def clean_dataframe(df, dataset_type):
     """
     Applies standard cleaning operations:
@@ -15,33 +77,32 @@ def clean_dataframe(df, dataset_type):
     # 1. Date Conversion
     if constants.COL_DATE in df.columns:
         # Format seems to be DD-MM-YYYY based on '31-12-2025'
-        df[constants.COL_DATE] = pd.to_datetime(df[constants.COL_DATE], format='%d-%m-%Y', errors='coerce')
+        df[constants.COL_DATE] = parse_dates(df[constants.COL_DATE], format='%d-%m-%Y')
 
-    # 2. Pincode to String/Category (preserve leading zeros if any, though Indian pincodes are 6 digits)
-    if constants.COL_PINCODE in df.columns:
-        df[constants.COL_PINCODE] = df[constants.COL_PINCODE].astype(str).str.replace(r'\.0$', '', regex=True)
+    # 2. Pincode as a compact integer (Indian pincodes are 6 digits, no leading zeros)
+    if constants.COL_PINCODE in df.columns and not pd.api.types.is_integer_dtype(df[constants.COL_PINCODE]):
+        df[constants.COL_PINCODE] = pd.to_numeric(df[constants.COL_PINCODE], errors='coerce').astype('Int32')
 
     # 3. Handle Numeric Columns based on dataset type
-    if dataset_type == 'enrolment':
-        cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
-    elif dataset_type == 'demographic':
-        cols = [constants.COL_DEMO_AGE_5_17, constants.COL_DEMO_AGE_18_PLUS]
-    elif dataset_type == 'biometric':
-        cols = [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS]
-    else:
-        cols = []
+    # Shards read with the declared schema already hold the compact dtype
+    cols = constants.MEASURE_COLUMNS.get(dataset_type, [])
+    schema = constants.DATASET_SCHEMAS.get(dataset_type, {})
 
     for c in cols:
         if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0).astype(int)
+            dtype = schema.get(c, 'int64')
+            if df[c].dtype != dtype:
+                df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0).clip(lower=0).astype(dtype)
 
-    # 4. Normalize State/District strings & Optimize Memory
+    # 4. Normalize State/District strings & Optimize Memory (junk states become
+    # NaN, junk districts UNKNOWN_DISTRICT so the state totals keep their rows)
     if constants.COL_STATE in df.columns:
-        df[constants.COL_STATE] = df[constants.COL_STATE].astype(str).str.title().str.strip().astype('category')
+        df[constants.COL_STATE] = normalize_names(df[constants.COL_STATE], constants.STATE_ALIASES)
     if constants.COL_DISTRICT in df.columns:
-        df[constants.COL_DISTRICT] = df[constants.COL_DISTRICT].astype(str).str.title().str.strip().astype('category')
+        df[constants.COL_DISTRICT] = normalize_names(df[constants.COL_DISTRICT], constants.DISTRICT_ALIASES,
+                                                     missing=constants.UNKNOWN_DISTRICT)
         
-    # Drop rows where date is NaT if Date is critical (it is)
-    df = df.dropna(subset=[constants.COL_DATE])
+    # Drop rows where date is NaT if Date is critical (it is), or the state is junk
+    df = df.dropna(subset=[c for c in (constants.COL_DATE, constants.COL_STATE) if c in df.columns])
 
     return df
@@ -1,17 +1,27 @@
 
+import numpy as np
 import pandas as pd
 from aadhaar_analytics.utils import constants
 
+def _expand_categorical(per_date, codes):
+    """Builds a row-level categorical from values computed per distinct date."""
+    cat = pd.Categorical(per_date)
+    return pd.Categorical.from_codes(cat.codes[codes], categories=cat.categories)
+
 def add_time_features(df):
     """Adds Month, Year, YearMonth columns."""
     if df.empty or constants.COL_DATE not in df.columns:
         return df
     
-    df['year'] = df[constants.COL_DATE].dt.year
-    df['month'] = df[constants.COL_DATE].dt.month
-    df['month_name'] = df[constants.COL_DATE].dt.month_name().astype('category')
+    # Derive each feature once per distinct date, then map back through the codes
+    codes, dates = pd.factorize(df[constants.COL_DATE], use_na_sentinel=False)
+    dates = pd.DatetimeIndex(dates)
+
+    df['year'] = np.asarray(dates.year)[codes]
+    df['month'] = np.asarray(dates.month)[codes]
+    df['month_name'] = _expand_categorical(dates.month_name(), codes)
     # String sortable format
-    df['year_month'] = df[constants.COL_DATE].dt.to_period('M').astype(str).astype('category')
+    df['year_month'] = _expand_categorical(dates.to_period('M').astype(str), codes)
     
     return df
 
@@ -0,0 +1,85 @@
+
+import os
+import json
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+
+# On-disk layout: one directory per frame holding `meta.json` plus one `.npy`
+# file per column (categoricals/strings as int codes + a categories array).
+# Only numpy is needed, and every column can be memory-mapped back in.
+
+META_FILE = "meta.json"
+
+def _column_kind(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return 'category'
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(s.dtype) or pd.api.types.is_numeric_dtype(s.dtype):
+        return 'numeric'
+    return 'string'
+
+def save_frame(df, path):
+    """
+    Writes a DataFrame as a directory of `.npy` columns (the index is dropped).
+    The directory is written next to `path` and swapped in atomically.
+    """
+    tmp = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp)
+    meta = {"rows": len(df), "columns": []}
+
+    for i, c in enumerate(df.columns):
+        s = df[c]
+        kind = _column_kind(s)
+        entry = {"name": c, "kind": kind, "file": f"{i}.npy"}
+        if kind in ('category', 'string'):
+            cat = s.cat if kind == 'category' else s.astype('category').cat
+            np.save(os.path.join(tmp, entry["file"]), cat.codes.to_numpy())
+            cats = np.asarray(cat.categories)
+            if cats.dtype == object:
+                cats = cats.astype(str)
+            entry["categories"] = f"{i}.cats.npy"
+            np.save(os.path.join(tmp, entry["categories"]), cats)
+        elif isinstance(s.dtype, pd.api.extensions.ExtensionDtype):
+            # Nullable extension ints (Int32, ...): plain numpy, NaN-padded floats if needed
+            values = s.to_numpy(dtype='float64', na_value=np.nan) if s.hasnans else s.to_numpy(dtype=s.dtype.numpy_dtype)
+            np.save(os.path.join(tmp, entry["file"]), values)
+        else:
+            np.save(os.path.join(tmp, entry["file"]), s.to_numpy())
+        entry["dtype"] = str(s.dtype)
+        meta["columns"].append(entry)
+
+    with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+
+def load_frame(path, mmap=False):
+    """
+    Reads a frame written by `save_frame`. With `mmap=True` numeric columns and
+    category codes are memory-mapped read-only instead of read into RAM.
+    """
+    with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    mode = 'r' if mmap else None
+    out = {}
+    for entry in meta["columns"]:
+        values = np.load(os.path.join(path, entry["file"]), mmap_mode=mode)
+        if entry["kind"] in ('category', 'string'):
+            cats = np.load(os.path.join(path, entry["categories"]))
+            col = pd.Categorical.from_codes(values, categories=cats)
+            if entry["kind"] == 'string':
+                col = pd.Series(col).astype(object).astype(entry["dtype"])
+            out[entry["name"]] = col
+        else:
+            out[entry["name"]] = values
+    return pd.DataFrame(out, copy=False) if out else pd.DataFrame(index=range(meta["rows"]))
+
+def frame_exists(path):
+    """True if `path` holds a complete frame written by `save_frame`."""
+    return os.path.exists(os.path.join(path, META_FILE))
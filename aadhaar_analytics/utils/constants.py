@@ -11,6 +11,7 @@ COL_DATE = 'date'
 COL_STATE = 'state'
 COL_DISTRICT = 'district'
 COL_PINCODE = 'pincode'
+COL_RECORDS = 'records' # Source rows folded into an aggregate row
 
 # Enrolment Columns
 COL_ENR_AGE_0_5 = 'age_0_5'
@@ -25,9 +26,132 @@ COL_DEMO_AGE_18_PLUS = 'demo_age_17_' # Inferred from "demo_age_17_"
 COL_BIO_AGE_5_17 = 'bio_age_5_17'
 COL_BIO_AGE_18_PLUS = 'bio_age_17_'   # Inferred from "bio_age_17_"
 
+# Count (measure) columns per dataset type
+MEASURE_COLUMNS = {
+    'enrolment': [COL_ENR_AGE_0_5, COL_ENR_AGE_5_17, COL_ENR_AGE_18_PLUS],
+    'demographic': [COL_DEMO_AGE_5_17, COL_DEMO_AGE_18_PLUS],
+    'biometric': [COL_BIO_AGE_5_17, COL_BIO_AGE_18_PLUS]
+}
+
+# Declared CSV schema per dataset type: normalized column name -> dtype parsed
+# straight off disk. Dates stay categorical until cleaning parses the unique values.
+DATASET_SCHEMAS = {
+    'enrolment': {
+        COL_DATE: 'category', COL_STATE: 'category', COL_DISTRICT: 'category', COL_PINCODE: 'int32',
+        COL_ENR_AGE_0_5: 'uint32', COL_ENR_AGE_5_17: 'uint32', COL_ENR_AGE_18_PLUS: 'uint32'
+    },
+    'demographic': {
+        COL_DATE: 'category', COL_STATE: 'category', COL_DISTRICT: 'category', COL_PINCODE: 'int32',
+        COL_DEMO_AGE_5_17: 'uint32', COL_DEMO_AGE_18_PLUS: 'uint32'
+    },
+    'biometric': {
+        COL_DATE: 'category', COL_STATE: 'category', COL_DISTRICT: 'category', COL_PINCODE: 'int32',
+        COL_BIO_AGE_5_17: 'uint32', COL_BIO_AGE_18_PLUS: 'uint32'
+    }
+}
+
+# Schema columns a shard may omit without a warning
+OPTIONAL_COLUMNS = [COL_PINCODE]
+
+# Canonical spellings for State/District names, applied after whitespace collapsing,
+# title-casing and '&' -> 'And'. Names without any letters (e.g. "100000") are dropped.
+# Canonical state names are the GeoJSON `properties.ST_NM` spellings, so the
+# choropleths join on them directly
+STATE_ALIASES = {
+    'West Bangal': 'West Bengal',
+    'Westbengal': 'West Bengal',
+    'Orissa': 'Odisha',
+    'Pondicherry': 'Puducherry',
+    'Jammu And Kashmir': 'Jammu & Kashmir',
+    'Andaman And Nicobar': 'Andaman & Nicobar',
+    'Andaman And Nicobar Islands': 'Andaman & Nicobar',
+    # Merged into a single UT in 2020
+    'Dadra And Nagar Haveli And Daman And Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'The Dadra And Nagar Haveli And Daman And Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'Dadra And Nagar Haveli': 'Dadra and Nagar Haveli and Daman and Diu',
+    'Daman And Diu': 'Dadra and Nagar Haveli and Daman and Diu',
+    # Cities/localities recorded in the state field
+    'Nagpur': 'Maharashtra',
+    'Raja Annamalai Puram': 'Tamil Nadu'
+}
+
+DISTRICT_ALIASES = {
+    'Ahmadabad': 'Ahmedabad',
+    'Ahmed Nagar': 'Ahmadnagar',
+    'Yamuna Nagar': 'Yamunanagar'
+}
+
+# Name given to districts that are missing or junk, so their rows still count
+# towards the state
+UNKNOWN_DISTRICT = "Unknown"
+
+# Grain of the pre-aggregated datasets (pincode is summed away)
+AGGREGATE_GRAIN = [COL_DATE, COL_STATE, COL_DISTRICT]
+
 # Mapping folder names to dataset types
 DATASET_TYPES = {
     'enrolment': 'api_data_aadhar_enrolment',
     'demographic': 'api_data_aadhar_demographic',
     'biometric': 'api_data_aadhar_biometric'
 }
+
+# Ingestion
+# Worker processes used to parse CSV shards (1 = serial). Parallel parsing needs an
+# `if __name__ == "__main__"` guard in the entry script on spawn-based platforms (Windows).
+INGEST_WORKERS = int(os.getenv("AADHAAR_INGEST_WORKERS", "1"))
+# Rows per chunk when streaming shards into running aggregates
+CHUNK_ROWS = int(os.getenv("AADHAAR_CHUNK_ROWS", "250000"))
+
+# Processed-data cache (cleaned, feature-engineered frames keyed by source fingerprint)
+CACHE_DIR = os.getenv("AADHAAR_CACHE_DIR", os.path.join(DATA_PROCESSED, "cache"))
+CACHE_ENABLED = os.getenv("AADHAAR_CACHE", "1") != "0"
+# Snapshot of the loaded state (processed frames + aggregate cube), memory-mapped on restart
+SNAPSHOT_DIR = os.getenv("AADHAAR_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshot"))
+# Dashboard workers only attach to the snapshot published by a separate loader
+# (`python -m aadhaar_analytics.ingestion.snapshot`) and share its pages read-only
+SNAPSHOT_ATTACH = os.getenv("AADHAAR_SNAPSHOT_ATTACH", "0") == "1"
+# Seconds an attaching worker waits for a current snapshot before loading on its own
+SNAPSHOT_WAIT = float(os.getenv("AADHAAR_SNAPSHOT_WAIT", "300"))
+
+# Dashboard
+# Computed tab results kept in memory (least recently used are evicted first)
+DASHBOARD_CACHE_SIZE = int(os.getenv("AADHAAR_DASHBOARD_CACHE_SIZE", "256"))
+# Background threads precomputing every state's tab views at startup (0 = off)
+WARMUP_WORKERS = int(os.getenv("AADHAAR_WARMUP_WORKERS", "2"))
+
+# Static site build
+# Worker processes generating the per-state views of build_web.py (1 = serial)
+BUILD_WORKERS = int(os.getenv("AADHAAR_BUILD_WORKERS", str(os.cpu_count() or 1)))
+# Reuse unchanged outputs of the previous build (also `build_web.py --incremental`)
+BUILD_INCREMENTAL = os.getenv("AADHAAR_BUILD_INCREMENTAL", "0") == "1"
+# Write a per-stage wall/CPU/peak-RSS report of the build (also `build_web.py --profile`)
+BUILD_PROFILE = os.getenv("AADHAAR_BUILD_PROFILE", "0") == "1"
+
+# AI (Gemini)
+GEMINI_MODEL = os.getenv("AADHAAR_GEMINI_MODEL", "gemini-2.5-flash")
+# Persistent response cache keyed by model + prompt (TTL in seconds, 0 = no expiry)
+AI_CACHE_ENABLED = os.getenv("AADHAAR_AI_CACHE", "1") != "0"
+AI_CACHE_DIR = os.getenv("AADHAAR_AI_CACHE_DIR", os.path.join(CACHE_DIR, "ai"))
+AI_CACHE_TTL = float(os.getenv("AADHAAR_AI_CACHE_TTL", str(7 * 24 * 3600)))
+AI_CACHE_SIZE = int(os.getenv("AADHAAR_AI_CACHE_SIZE", "5000"))
+# Serve cached answers only; never call the model
+AI_OFFLINE = os.getenv("AADHAAR_AI_OFFLINE", "0") == "1"
+# Endpoint override (e.g. a local stub server); None = the public API
+GEMINI_BASE_URL = os.getenv("AADHAAR_GEMINI_BASE_URL") or None
+# Per-call timeout (seconds), retries of transient failures and the first backoff delay
+AI_TIMEOUT = float(os.getenv("AADHAAR_AI_TIMEOUT", "60"))
+AI_RETRIES = int(os.getenv("AADHAAR_AI_RETRIES", "3"))
+AI_BACKOFF = float(os.getenv("AADHAAR_AI_BACKOFF", "1.0"))
+# Batch generation: concurrent calls and calls started per second (0 = unlimited)
+AI_CONCURRENCY = int(os.getenv("AADHAAR_AI_CONCURRENCY", "4"))
+AI_RATE = float(os.getenv("AADHAAR_AI_RATE", "1.0"))
+# Shared clients (one per API key): how many are kept, and seconds an unused one
+# stays in the registry (its kept-alive connections close once nothing uses it)
+AI_CLIENT_POOL_SIZE = int(os.getenv("AADHAAR_AI_CLIENT_POOL_SIZE", "16"))
+AI_CLIENT_IDLE = float(os.getenv("AADHAAR_AI_CLIENT_IDLE", "300"))
+# Approximate token budget of the data embedded in trend prompts; longer
+# histories are summarised and downsampled to fit
+AI_PROMPT_TOKENS = int(os.getenv("AADHAAR_AI_PROMPT_TOKENS", "1500"))
+# Seconds the dashboards wait for a streamed AI answer before showing the
+# static measure instead (the answer is still cached when it arrives)
+AI_LATENCY_BUDGET = float(os.getenv("AADHAAR_AI_LATENCY_BUDGET", "15"))
@@ -0,0 +1,90 @@
+
+import numpy as np
+import pandas as pd
+from aadhaar_analytics.utils import constants
+
+# State selections accepted by the dashboards: "All", None, a state name, or a
+# list of state names (an empty list, or one holding only "All", means everything;
+# "All" next to named states is ignored).
+
+def normalize_selection(selected):
+    """Returns None for an "everything" selection, otherwise a list of states."""
+    if selected is None or isinstance(selected, str):
+        return None if selected in (None, "", "All") else [selected]
+    selected = [s for s in selected if s != "All"]
+    return selected or None
+
+def selection_label(selected):
+    """Display name of a selection, e.g. "All" or "Bihar, Kerala"."""
+    states = normalize_selection(selected)
+    return "All" if states is None else ", ".join(states)
+
+def state_offsets(sorted_states):
+    """{state: (start, stop)} row ranges of an array sorted by state."""
+    sorted_states = np.asarray(sorted_states)
+    if len(sorted_states) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, sorted_states[1:] != sorted_states[:-1]])
+    stops = np.r_[starts[1:], len(sorted_states)]
+    return {sorted_states[a]: (int(a), int(b)) for a, b in zip(starts, stops)}
+
+def selection_runs(offsets, states):
+    """Merges the row ranges of the selected states into sorted contiguous runs."""
+    ranges = sorted(offsets[s] for s in set(states) if s in offsets)
+    runs = []
+    for start, stop in ranges:
+        if runs and runs[-1][1] == start:
+            runs[-1] = (runs[-1][0], stop)
+        else:
+            runs.append((start, stop))
+    return runs
+
+def runs_indexer(runs):
+    """A slice for zero or one run (so indexing returns a view), else row positions."""
+    if not runs:
+        return slice(0, 0)
+    if len(runs) == 1:
+        return slice(*runs[0])
+    return np.concatenate([np.arange(a, b) for a, b in runs])
+
+class StatePartitions:
+    """
+    A frame stably sorted by state once, with the row range of every state, so
+    a state filter is a slice (a view) instead of a boolean scan and copy.
+    """
+    def __init__(self, df, column=constants.COL_STATE):
+        if df is None or df.empty or column not in df.columns:
+            self.frame = df if df is not None else pd.DataFrame()
+            self.offsets = {}
+            return
+
+        states = df[column]
+        if isinstance(states.dtype, pd.CategoricalDtype):
+            codes, labels = states.cat.codes.to_numpy(), np.asarray(states.cat.categories)
+        else:
+            codes, labels = pd.factorize(states, sort=True)
+        keep = codes >= 0
+        order = np.flatnonzero(keep)[np.argsort(codes[keep], kind='stable')]
+
+        if len(order) == len(df) and (np.diff(order) == 1).all() and df.index.equals(pd.RangeIndex(len(df))):
+            # Already sorted (e.g. a snapshot frame): keep it as is, so a
+            # memory-mapped frame stays shared instead of being copied
+            self.frame = df
+        else:
+            self.frame = df.take(order).reset_index(drop=True)
+        sorted_codes = codes[order]
+        self.offsets = {labels[c]: span for c, span in state_offsets(sorted_codes).items()}
+
+    def states(self):
+        """Sorted list of states with rows."""
+        return sorted(self.offsets)
+
+    def get(self, selected=None):
+        """Rows of the selected state(s); a view unless several non-adjacent states are picked."""
+        states = normalize_selection(selected)
+        if states is None:
+            return self.frame
+        indexer = runs_indexer(selection_runs(self.offsets, states))
+        if isinstance(indexer, slice):
+            return self.frame.iloc[indexer]
+        return self.frame.take(indexer)
@@ -0,0 +1,130 @@
+
+import os
+import csv
+import json
+import time
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+REPORT_FIELDS = ["stage", "state", "wall_s", "cpu_s", "peak_rss_mb", "rss_mb", "rss_delta_mb", "pid"]
+
+def rss_mb():
+    """Current resident set size in MB (Linux only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+# Per-stage peaks: Linux lets a process reset its RSS high-water mark (VmHWM),
+# so it is read and reset at every lap. Each open stage keeps the largest value
+# seen since it began, across the resets made by other (nested) stages.
+_WATCHES = weakref.WeakSet()
+
+class _PeakWatch:
+    __slots__ = ("value", "__weakref__")
+
+    def __init__(self):
+        self.value = 0.0
+
+def _high_water_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _sample_peak():
+    """Folds the high-water mark into every open stage and resets it; False if unsupported."""
+    hwm = _high_water_mb()
+    if hwm is None:
+        return False
+    for watch in list(_WATCHES):
+        watch.value = max(watch.value, hwm)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+class Profiler:
+    """
+    Records wall time, CPU time and memory of named stages. Stages are timed
+    as laps: each `lap(name)` covers the time since the previous one. Memory
+    is the stage's peak RSS (None where it cannot be measured per stage) and
+    the change in RSS over the stage. Disabled profilers record nothing, so
+    instrumented code costs nothing by default.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.records = []
+
+    def laps(self, state=None):
+        """Returns `lap(name)`, recording the stage that ends now (tagged with `state`)."""
+        watch = _PeakWatch()
+        if self.enabled:
+            _sample_peak()
+            watch.value = rss_mb() or 0.0
+            _WATCHES.add(watch)
+        last = [time.perf_counter(), time.process_time(), rss_mb()]
+        def lap(name):
+            if not self.enabled:
+                return
+            wall, cpu = time.perf_counter(), time.process_time()
+            per_stage = _sample_peak()
+            rss = rss_mb()
+            self.records.append({
+                "stage": name, "state": state,
+                "wall_s": round(wall - last[0], 6), "cpu_s": round(cpu - last[1], 6),
+                "peak_rss_mb": round(watch.value, 1) if per_stage else None,
+                "rss_mb": rss,
+                "rss_delta_mb": round(rss - last[2], 1) if rss is not None and last[2] is not None else None,
+                "pid": os.getpid()
+            })
+            watch.value = rss or 0.0
+            last[:] = [time.perf_counter(), time.process_time(), rss]
+        return lap
+
+    def extend(self, records):
+        """Adds records gathered by another (e.g. worker process) profiler."""
+        if self.enabled:
+            self.records.extend(records)
+
+    def ranked(self):
+        """Records summed per stage across states, slowest (wall time) first."""
+        totals = {}
+        for r in self.records:
+            t = totals.setdefault(r["stage"], {"stage": r["stage"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                               "peak_rss_mb": None, "rss_delta_mb": None})
+            t["calls"] += 1
+            t["wall_s"] += r["wall_s"]
+            t["cpu_s"] += r["cpu_s"]
+            if r.get("peak_rss_mb") is not None:
+                t["peak_rss_mb"] = max(t["peak_rss_mb"] or 0, r["peak_rss_mb"])
+            if r.get("rss_delta_mb") is not None:
+                t["rss_delta_mb"] = round((t["rss_delta_mb"] or 0) + r["rss_delta_mb"], 1)
+        return sorted(totals.values(), key=lambda t: -t["wall_s"])
+
+    def write_report(self, path_base, **meta):
+        """Writes `<path_base>.json` (summary + records) and `<path_base>.csv` (records)."""
+        with open(path_base + ".json", "w", encoding="utf-8") as f:
+            json.dump(dict(meta, summary=self.ranked(), records=self.records), f, indent=1)
+        with open(path_base + ".csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def log_summary(self, top=15):
+        """Logs the slowest stages."""
+        logger.info(f"{'stage':<24}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'+RSS MB':>10}")
+        for t in self.ranked()[:top]:
+            peak = f"{t['peak_rss_mb']:.1f}" if t["peak_rss_mb"] is not None else "-"
+            delta = f"{t['rss_delta_mb']:+.1f}" if t["rss_delta_mb"] is not None else "-"
+            logger.info(f"{t['stage']:<24}{t['calls']:>6}{t['wall_s']:>10.3f}{t['cpu_s']:>10.3f}{peak:>10}{delta:>10}")
@@ -0,0 +1,69 @@
+
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class Warmup:
+    """
+    Runs (label, callable) tasks in the given priority order on a pool of daemon
+    threads and tracks progress. Failures are logged and counted as done, so
+    the callers fall back to computing that result on demand.
+    """
+    def __init__(self, tasks, workers=2, name="Warm-up"):
+        self.name = name
+        self.total = len(tasks)
+        self.done = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+        self._workers = max(1, workers)
+        self._tasks = queue.Queue()
+        for task in tasks:
+            self._tasks.put(task)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        self.started_at = time.time()
+        logger.info(f"{self.name}: {self.total} tasks on {self._workers} workers...")
+        if self.total == 0:
+            self._finish()
+        for i in range(self._workers):
+            threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops handing out new tasks; running ones complete."""
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                label, task = self._tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                task()
+            except Exception as e:
+                logger.warning(f"{self.name}: {label} failed: {e}")
+                with self._lock:
+                    self.failed += 1
+            with self._lock:
+                self.done += 1
+                if self.done == self.total:
+                    self._finish()
+
+    def _finish(self):
+        self.finished_at = time.time()
+        logger.info(f"{self.name}: finished {self.total} tasks in {self.finished_at - self.started_at:.1f}s ({self.failed} failed).")
+
+    @property
+    def is_done(self):
+        return self.finished_at is not None
+
+    def progress(self):
+        """Fraction of tasks done (1.0 when there is nothing to do)."""
+        return self.done / self.total if self.total else 1.0
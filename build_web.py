@@ -7,18 +7,27 @@ import sys
 import numpy as np
 import logging
 import time
+import re
+import gzip
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from aadhaar_analytics.ingestion import loader
-from aadhaar_analytics.preprocessing import cleaning, feature_engineering
+from aadhaar_analytics.ingestion import cache, snapshot
+from aadhaar_analytics.preprocessing import feature_engineering
+from aadhaar_analytics.analytics import predictive, prescriptive
+from aadhaar_analytics.ai import gemini_service
 from aadhaar_analytics.analytics.descriptive import DescriptiveAnalytics
 from aadhaar_analytics.analytics.diagnostic import DiagnosticAnalytics
 from aadhaar_analytics.analytics.predictive import PredictiveAnalytics
 from aadhaar_analytics.analytics.prescriptive import PrescriptiveAnalytics
 from aadhaar_analytics.ai.gemini_service import GeminiService
-from aadhaar_analytics.utils import constants
+from aadhaar_analytics.utils import constants, partitions, columnar
+from aadhaar_analytics.utils.profiling import Profiler
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +44,20 @@ try:
 except:
     GEMINI_API_KEY = None
 
+# Brotli is optional; without it only the .gz variants are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Output layout under BUILD_DIR/data:
+#   index.json           metadata, shard paths per state and the national view
+#   states/<slug>.json   one state's view, fetched by the client when selected
+#   manifest.json        fingerprint of every view's inputs (incremental builds)
+# Each file also has precompressed .gz (and .br) variants for static servers.
+# Tables inside a view are columnar (see encode_table).
+DATA_DIR = "data"
+
 class NpEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, (np.int_, np.intc, np.intp, np.int8,
@@ -47,36 +70,278 @@ class NpEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NpEncoder, self).default(obj)
 
+def state_slug(state_name):
+    """File-name-safe shard name of a state, e.g. "Jammu & Kashmir" -> "jammu-kashmir"."""
+    return re.sub(r'[^a-z0-9]+', '-', state_name.lower()).strip('-')
+
+def write_json(path, obj):
+    """Writes `obj` as JSON plus .gz/.br variants; returns the uncompressed size."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    raw = json.dumps(obj, cls=NpEncoder, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(raw)
+    # mtime=0 keeps the .gz bytes stable across builds
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(raw))
+    return len(raw)
+
+def encode_table(df):
+    """
+    Columnar JSON form of a frame, {"n": rows, "columns": {name: column}}:
+    numbers as plain arrays, state/district/categorical columns as
+    {"dict": names, "codes": indexes} and dates as {"epoch": "YYYY-MM-DD",
+    "days": offsets}. Decoded back to row objects by decodeTable in web/js/app.js.
+    """
+    columns = {}
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_datetime64_any_dtype(s.dtype):
+            days = s.to_numpy().astype('datetime64[D]')
+            epoch = days.min() if len(days) else np.datetime64('1970-01-01')
+            columns[c] = {"epoch": str(epoch), "days": (days - epoch).astype(np.int64).tolist()}
+        elif isinstance(s.dtype, pd.CategoricalDtype) or c in (constants.COL_STATE, constants.COL_DISTRICT):
+            codes, names = pd.factorize(s, sort=True)
+            columns[c] = {"dict": [str(n) for n in names], "codes": codes.tolist()}
+        elif pd.api.types.is_numeric_dtype(s.dtype) and not s.hasnans:
+            # tolist() converts the whole array to Python numbers in one call
+            columns[c] = s.to_numpy().tolist()
+        else:
+            columns[c] = s.astype(object).where(s.notna(), None).tolist()
+    return {"n": len(df), "columns": columns}
+
+# --- Incremental builds ---
+BUILD_MANIFEST = "manifest.json"
+
+def views_code_version(ai=None):
+    """Hash of the code the views are computed with (and whether AI text is included)."""
+    h = hashlib.sha1(cache.code_version().encode('utf-8'))
+    for module in (sys.modules[__name__], feature_engineering, predictive, prescriptive, gemini_service):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    h.update(b'ai' if ai else b'no-ai')
+    return h.hexdigest()[:12]
+
+def state_fingerprint(state_name, parts):
+    """Hash of a state's rows in every dataset."""
+    h = hashlib.sha1()
+    for p in parts:
+        rows = p.get(state_name)
+        h.update(','.join(map(str, rows.columns)).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+def read_build_manifest():
+    """The manifest of the previous build in BUILD_DIR, or None."""
+    try:
+        with open(os.path.join(BUILD_DIR, DATA_DIR, BUILD_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def copy_web_assets(src_web, incremental=False):
+    """Copies web/ into BUILD_DIR; incrementally, only files whose content changed."""
+    copied = 0
+    for root, _, files in os.walk(src_web):
+        for name in files:
+            s = os.path.join(root, name)
+            d = os.path.join(BUILD_DIR, os.path.relpath(s, src_web))
+            if incremental and os.path.exists(d) and file_hash(s) == file_hash(d):
+                continue
+            os.makedirs(os.path.dirname(d), exist_ok=True)
+            shutil.copy2(s, d)
+            copied += 1
+    return copied
+
 def get_ai_service():
-    if GEMINI_API_KEY:
+    if GEMINI_API_KEY or constants.AI_OFFLINE:
         return GeminiService(GEMINI_API_KEY)
     return None
 
-def build():
+# Helper to compute stats for a specific state view
+def compute_view(state_name, frames, parts, presc=None, with_ai=False, prof=None):
+    # Times each sub-step when profiling ("view.*" stages, nested inside the
+    # build's "national view" / "state views" stages)
+    lap = (prof or Profiler(enabled=False)).laps(state_name)
+
+    # Filter (if not All)
+    if state_name != "All":
+        d_e, d_d, d_b = (p.get(state_name) for p in parts)
+    else:
+        d_e, d_d, d_b = frames
+
+    view_data = {}
+    lap("view.filter")
+
+    # 1. KPI
+    view_data['kpis'] = feature_engineering.calculate_kpis(d_e, d_d, d_b)
+    lap("view.kpis")
+
+    # 2. Trends (Enrolment)
+    try:
+        # Descriptive Analytics expects the full DF and does groupby internally
+        # We must instantiate a new engine or manually group.
+        # Manual grouping is faster/cleaner here.
+        if not d_e.empty:
+            # Group by Date and Sum Age columns
+            # We need Age 0-5, 5-17, 18+
+            cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
+            view_data['trend_enrolment'] = d_e.groupby(constants.COL_DATE)[cols].sum().reset_index()
+
+            # Age Distribution (Pie)
+            age_dist = d_e[cols].sum().to_dict()
+            view_data['age_distribution'] = age_dist
+
+            # Funnel (Same as Age Dist basically)
+            view_data['funnel'] = age_dist
+    except Exception as e:
+        logger.error(f"Trend error {state_name}: {e}")
+    lap("view.trend_enrolment")
+
+    # 3. Trends (Updates)
+    try:
+        if not d_d.empty:
+           cols_d = [constants.COL_DEMO_AGE_5_17, constants.COL_DEMO_AGE_18_PLUS]
+           # Ensure cols exist
+           valid_cols = [c for c in cols_d if c in d_d.columns]
+           if valid_cols:
+               view_data['trend_demo'] = d_d.groupby(constants.COL_DATE)[valid_cols].sum().reset_index()
+    except: pass
+
+    try:
+       if not d_b.empty:
+           cols_b = [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS]
+           valid_cols_b = [c for c in cols_b if c in d_b.columns]
+           if valid_cols_b:
+               view_data['trend_bio'] = d_b.groupby(constants.COL_DATE)[valid_cols_b].sum().reset_index()
+    except: pass
+    lap("view.trend_updates")
+
+    # 4. Forecasting (Only for National to save build time, or top states)
+    # If State == All, do forecast
+    if state_name == "All" and not d_e.empty:
+        try:
+            # Need to use the Class
+            local_pred = PredictiveAnalytics(d_e, d_b)
+            fc_enr = local_pred.forecast_enrolment_demand()
+            if not fc_enr.empty:
+                view_data['forecast_enrolment'] = fc_enr
+
+            fc_bio = local_pred.forecast_biometric_load()
+            if not fc_bio.empty:
+                view_data['forecast_bio'] = fc_bio
+        except Exception as e:
+            logger.error(f"Forecast error: {e}")
+        lap("view.forecast")
+
+    # 5. Outliers / Diagnostic (Only for All, decomposed by State)
+    if state_name == "All":
+         # State performance Bar
+         try:
+             summ = d_e.groupby(constants.COL_STATE)[[constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]].sum()
+             summ['Total'] = summ.sum(axis=1)
+             view_data['state_performance'] = summ.sort_values('Total', ascending=False).head(10).reset_index()
+
+             # Treemap Data (State -> District)
+             # Too big to send all? Send Top 50 Districts.
+             tree = d_e.groupby([constants.COL_STATE, constants.COL_DISTRICT])['age_0_5'].sum().reset_index(name='val') # utilizing one col for size proxy
+             # Actually utilize total
+             d_e['Total_Enr'] = d_e[constants.COL_ENR_AGE_0_5] + d_e[constants.COL_ENR_AGE_5_17] + d_e[constants.COL_ENR_AGE_18_PLUS]
+             tree = d_e.groupby([constants.COL_STATE, constants.COL_DISTRICT])['Total_Enr'].sum().reset_index(name='Total')
+             view_data['treemap'] = tree.nlargest(200, 'Total')
+
+             # Map Data (State level total)
+             map_d = d_e.groupby(constants.COL_STATE)['Total_Enr'].sum().reset_index()
+             view_data['map_data'] = map_d
+
+             # Recommendations
+             rec_df = presc.get_recommendations() if presc else pd.DataFrame()
+             view_data['recommendations'] = rec_df.head(50)
+
+         except Exception as e:
+             logger.error(f"Diag error: {e}")
+         lap("view.diagnostic")
+
+    # 6. AI Insights: only the prompts are built here; build() answers the
+    # prompts of every view in one rate-limited batch (GeminiService.generate_batch)
+    if with_ai:
+        prompts = {'kpi_summary': GeminiService.kpi_prompt(view_data['kpis'], state_name)}
+        if 'trend_enrolment' in view_data:
+            prompts['trend_analysis'] = GeminiService.trend_prompt(view_data['trend_enrolment'])
+        if 'recommendations' in view_data and not view_data['recommendations'].empty:
+            prompts['policy_draft'] = GeminiService.policy_prompt(view_data['recommendations'])
+        view_data['ai_prompts'] = prompts
+        lap("view.ai_prompts")
+
+    # Tables are kept as frames up to here and serialised column-wise once
+    encoded = {k: encode_table(v) if isinstance(v, pd.DataFrame) else v for k, v in view_data.items()}
+    lap("view.encode")
+    return encoded
+
+# State views run on a process pool. Workers share the frames instead of
+# receiving pickled copies: under fork they inherit this state as is, otherwise
+# (spawn/forkserver) the initializer maps the copy build() wrote to frames_dir.
+# The build options always arrive as initializer arguments.
+_WORKER_STATE = {}
+WORKER_FRAMES = ['enrolment', 'demographic', 'biometric']
+
+def _init_view_worker(frames_dir, profile, with_ai):
+    _WORKER_STATE.update(profile=profile, with_ai=with_ai)
+    if 'frames' not in _WORKER_STATE:
+        frames = tuple(columnar.load_frame(os.path.join(frames_dir, k), mmap=True) for k in WORKER_FRAMES)
+        _WORKER_STATE.update(frames=frames, parts=[partitions.StatePartitions(df) for df in frames])
+
+def _share_frames(parts):
+    """Writes the state-sorted frames for non-forked workers to map; returns the directory."""
+    frames_dir = tempfile.mkdtemp(prefix="aadhaar-build-")
+    for name, part in zip(WORKER_FRAMES, parts):
+        columnar.save_frame(part.frame, os.path.join(frames_dir, name))
+    return frames_dir
+
+def _state_view(state_name):
+    start = time.time()
+    prof = Profiler(enabled=_WORKER_STATE.get('profile', False))
+    view = compute_view(state_name, _WORKER_STATE['frames'], _WORKER_STATE['parts'],
+                        with_ai=_WORKER_STATE.get('with_ai', False), prof=prof)
+    return state_name, view, time.time() - start, prof.records
+
+def build(incremental=None, profile=None):
+    """
+    Builds the static site into BUILD_DIR. With `incremental=True` the previous
+    output is kept and only views whose input rows (or code) changed are
+    recomputed and rewritten. With `profile=True` the wall time, CPU time and
+    peak RSS of every stage (and of every view's sub-steps) are written to
+    data/build_profile.json/.csv and the slowest stages are logged.
+    """
+    incremental = constants.BUILD_INCREMENTAL if incremental is None else incremental
+    profile = constants.BUILD_PROFILE if profile is None else profile
+    prof = Profiler(enabled=profile)
+    lap = prof.laps()
     start_time = time.time()
     
     # 1. Setup Build Dir
-    if os.path.exists(BUILD_DIR):
+    manifest = read_build_manifest() if incremental else None
+    if not incremental and os.path.exists(BUILD_DIR):
         shutil.rmtree(BUILD_DIR)
-    os.makedirs(BUILD_DIR)
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    lap("setup")
 
     # 2. Data Loading
     logger.info("Loading Datasets...")
-    raw_data = loader.load_all_datasets()
-    
-    data = {}
-    for dtype in ['enrolment', 'demographic', 'biometric']:
-        df = raw_data.get(dtype, pd.DataFrame())
-        if not df.empty:
-            df = cleaning.clean_dataframe(df, dtype)
-            df = feature_engineering.add_time_features(df)
-            # Optimize size: Convert object cols to categories if possible, or just keep needed cols
-            # For JSON export, we want Aggregates, not raw rows usually.
-        data[dtype] = df
+    # Cleaned, feature-engineered date x state x district totals (memory-mapped
+    # from the snapshot when the sources have not changed)
+    data, _ = snapshot.load_state()
 
     df_enr = data['enrolment']
     df_demo = data['demographic']
     df_bio = data['biometric']
+    lap("load")
 
     # 3. Analytics Engines
     desc = DescriptiveAnalytics(df_enr, df_demo, df_bio)
@@ -86,6 +351,7 @@ def build():
     
     # Init AI
     ai = get_ai_service()
+    lap("engines")
     
     # 4. Generate Data Structure
     # We will export a Structure that supports Filtering by 'state'.
@@ -101,186 +367,141 @@ def build():
     # A better approach for Static Site: Pre-calculate per-state aggregates.
     
     logger.info("Computing Aggregates...")
+
+    # Partition each dataset by state once; a state view is then a slice
+    parts = [partitions.StatePartitions(df) for df in (df_enr, df_demo, df_bio)]
+    lap("partitions")
     
     dataset = {
         "metadata": {
             "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "states": ["All"] + sorted(df_enr[constants.COL_STATE].dropna().unique().tolist()) if not df_enr.empty else []
+            "encoding": "columnar",
+            "states": ["All"] + sorted(set().union(*(p.states() for p in parts)))
         },
         "stats": {} # Keyed by state
     }
 
-    # Helper to compute stats for a specific state view
-    def compute_view(state_name, df_e, df_d, df_b):
-        # Filter (if not All)
-        if state_name != "All":
-            d_e = df_e[df_e[constants.COL_STATE] == state_name] if not df_e.empty else df_e
-            d_d = df_d[df_d[constants.COL_STATE] == state_name] if not df_d.empty else df_d
-            d_b = df_b[df_b[constants.COL_STATE] == state_name] if not df_b.empty else df_b
-        else:
-            d_e, d_d, d_b = df_e, df_d, df_b
-            
-        view_data = {}
-        
-        # 1. KPI
-        view_data['kpis'] = feature_engineering.calculate_kpis(d_e, d_d, d_b)
-        
-        # 2. Trends (Enrolment)
-        try:
-            # Descriptive Analytics expects the full DF and does groupby internally
-            # We must instantiate a new engine or manually group.
-            # Manual grouping is faster/cleaner here.
-            if not d_e.empty:
-                # Group by Date and Sum Age columns
-                # We need Age 0-5, 5-17, 18+
-                cols = [constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]
-                trend = d_e.groupby(constants.COL_DATE)[cols].sum().reset_index()
-                trend[constants.COL_DATE] = trend[constants.COL_DATE].astype(str)
-                view_data['trend_enrolment'] = trend.to_dict(orient='records')
-                
-                # Age Distribution (Pie)
-                age_dist = d_e[cols].sum().to_dict()
-                view_data['age_distribution'] = age_dist
-                
-                # Funnel (Same as Age Dist basically)
-                view_data['funnel'] = age_dist
-        except Exception as e:
-            logger.error(f"Trend error {state_name}: {e}")
+    all_states = [s for s in dataset['metadata']['states'] if s != 'All']
+    data_dir = os.path.join(BUILD_DIR, DATA_DIR)
+    shards = {st: f"{DATA_DIR}/states/{state_slug(st)}.json" for st in all_states}
 
-        # 3. Trends (Updates)
-        try:
-            if not d_d.empty:
-               cols_d = [constants.COL_DEMO_AGE_5_17, constants.COL_DEMO_AGE_18_PLUS]
-               # Ensure cols exist
-               valid_cols = [c for c in cols_d if c in d_d.columns]
-               if valid_cols:
-                   trend_d = d_d.groupby(constants.COL_DATE)[valid_cols].sum().reset_index()
-                   trend_d[constants.COL_DATE] = trend_d[constants.COL_DATE].astype(str)
-                   view_data['trend_demo'] = trend_d.to_dict(orient='records')
-        except: pass
-        
-        try:
-           if not d_b.empty:
-               cols_b = [constants.COL_BIO_AGE_5_17, constants.COL_BIO_AGE_18_PLUS]
-               valid_cols_b = [c for c in cols_b if c in d_b.columns]
-               if valid_cols_b:
-                   trend_b = d_b.groupby(constants.COL_DATE)[valid_cols_b].sum().reset_index()
-                   trend_b[constants.COL_DATE] = trend_b[constants.COL_DATE].astype(str)
-                   view_data['trend_bio'] = trend_b.to_dict(orient='records')
-        except: pass
-
-        # 4. Forecasting (Only for National to save build time, or top states)
-        # If State == All, do forecast
-        if state_name == "All" and not d_e.empty:
-            try:
-                # Need to use the Class
-                local_pred = PredictiveAnalytics(d_e, d_b)
-                fc_enr = local_pred.forecast_enrolment_demand()
-                if not fc_enr.empty:
-                    fc_enr['date'] = fc_enr['date'].astype(str)
-                    view_data['forecast_enrolment'] = fc_enr.to_dict(orient='records')
-                
-                fc_bio = local_pred.forecast_biometric_load()
-                if not fc_bio.empty:
-                    fc_bio['date'] = fc_bio['date'].astype(str)
-                    view_data['forecast_bio'] = fc_bio.to_dict(orient='records')
-            except Exception as e:
-                logger.error(f"Forecast error: {e}")
-
-        # 5. Outliers / Diagnostic (Only for All, decomposed by State)
-        if state_name == "All":
-             # State performance Bar
-             try:
-                 summ = d_e.groupby(constants.COL_STATE)[[constants.COL_ENR_AGE_0_5, constants.COL_ENR_AGE_5_17, constants.COL_ENR_AGE_18_PLUS]].sum()
-                 summ['Total'] = summ.sum(axis=1)
-                 view_data['state_performance'] = summ.sort_values('Total', ascending=False).head(10).reset_index().to_dict(orient='records')
-                 
-                 # Treemap Data (State -> District)
-                 # Too big to send all? Send Top 50 Districts.
-                 tree = d_e.groupby([constants.COL_STATE, constants.COL_DISTRICT])['age_0_5'].sum().reset_index(name='val') # utilizing one col for size proxy
-                 # Actually utilize total
-                 d_e['Total_Enr'] = d_e[constants.COL_ENR_AGE_0_5] + d_e[constants.COL_ENR_AGE_5_17] + d_e[constants.COL_ENR_AGE_18_PLUS]
-                 tree = d_e.groupby([constants.COL_STATE, constants.COL_DISTRICT])['Total_Enr'].sum().reset_index(name='Total')
-                 view_data['treemap'] = tree.nlargest(200, 'Total').to_dict(orient='records')
-                 
-                 # Map Data (State level total)
-                 map_d = d_e.groupby(constants.COL_STATE)['Total_Enr'].sum().reset_index()
-                 view_data['map_data'] = map_d.to_dict(orient='records')
-                 
-                 # Recommendations
-                 rec_df = presc.get_recommendations()
-                 view_data['recommendations'] = rec_df.head(50).to_dict(orient='records') if not rec_df.empty else []
-                 
-             except Exception as e:
-                 logger.error(f"Diag error: {e}")
-
-        # 6. AI Insights (Only for All to save API, or handle efficiently)
-        if state_name == "All" and ai:
-            view_data['ai'] = {}
-            try:
-                view_data['ai']['kpi_summary'] = ai.explain_kpis(view_data['kpis'], state_name)
-            except: view_data['ai']['kpi_summary'] = "AI Unavailable"
-            
-            try:
-                # Use simplified DF for prompt
-                if 'trend_enrolment' in view_data:
-                    df_t = pd.DataFrame(view_data['trend_enrolment'])
-                    view_data['ai']['trend_analysis'] = ai.analyze_trends(df_t)
-            except: pass
-            
-            try:
-                 if 'recommendations' in view_data and view_data['recommendations']:
-                     rec_df_ai = pd.DataFrame(view_data['recommendations'])
-                     view_data['ai']['policy_draft'] = ai.recommend_policy(rec_df_ai)
-            except: pass
-            
-        return view_data
+    # Fingerprint every view's inputs; a view is reused when its fingerprint
+    # matches the previous build's and its output is still on disk
+    version = views_code_version(ai)
+    fingerprints = {st: state_fingerprint(st, parts) for st in all_states}
+    fingerprints['All'] = hashlib.sha1(json.dumps(fingerprints, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    previous = manifest['views'] if manifest and manifest.get('version') == version else {}
+    def reusable(st):
+        output = os.path.join(data_dir, "index.json") if st == 'All' else os.path.join(BUILD_DIR, shards[st])
+        return previous.get(st) == fingerprints[st] and os.path.exists(output)
+    lap("fingerprints")
 
     # Generate "All" view
-    logger.info("Generating National View...")
-    dataset['stats']['All'] = compute_view("All", df_enr, df_demo, df_bio)
+    if reusable('All'):
+        logger.info("National View unchanged; reusing it.")
+        with open(os.path.join(data_dir, "index.json"), 'r', encoding='utf-8') as f:
+            dataset['stats']['All'] = json.load(f)['stats']['All']
+    else:
+        logger.info("Generating National View...")
+        dataset['stats']['All'] = compute_view("All", (df_enr, df_demo, df_bio), parts, presc=presc,
+                                                with_ai=ai is not None, prof=prof)
+    lap("national view")
 
-    # Generate Individual State views (Lite version)
-    # We will limit to Top 15 States to ensure build finishes within reasonable time
-    all_states = dataset['metadata']['states']
-    if 'All' in all_states: all_states.remove('All')
-    
-    # Sort states by enrolment volume if possible to pick top ones
-    # We can use the 'state_performance' metric calculated for All view
+    # Generate Individual State views (Lite version) for every state whose
+    # rows changed, largest first (they take longest)
+    def state_rows(st):
+        return sum(p.offsets[st][1] - p.offsets[st][0] for p in parts if st in p.offsets)
+    states_to_process = sorted((st for st in all_states if not reusable(st)), key=state_rows, reverse=True)
+    if incremental:
+        logger.info(f"Incremental build: {len(all_states) - len(states_to_process)} state views unchanged.")
+
+    workers = max(1, min(constants.BUILD_WORKERS, len(states_to_process)))
+    logger.info(f"Processing {len(states_to_process)} states on {workers} workers...")
+    states_start = time.time()
+    _WORKER_STATE.update(frames=(df_enr, df_demo, df_bio), parts=parts, profile=profile, with_ai=ai is not None)
+    timings = {}
+    frames_dir = None
     try:
-        top_states = [x['state'] for x in dataset['stats']['All']['state_performance']]
-        # Add remaining if any, up to limit
-        priority_states = top_states + [s for s in all_states if s not in top_states]
-        # Slice
-        states_to_process = priority_states[:15]
-    except:
-        states_to_process = all_states[:10] # Fallback
-        
-    logger.info(f"Processing {len(states_to_process)} priority states...")
-
-    for st in states_to_process:
-        # logger.info(f"Generating view for {st}...") 
-        dataset['stats'][st] = compute_view(st, df_enr, df_demo, df_bio)
-
-    # 5. Write JSON
-    logger.info(f"Saving data.json to {BUILD_DIR}...")
-    with open(os.path.join(BUILD_DIR, "data.json"), "w", encoding='utf-8') as f:
-        json.dump(dataset, f, cls=NpEncoder)
+        if not states_to_process:
+            results = []
+        elif workers > 1:
+            if multiprocessing.get_start_method() != 'fork':
+                frames_dir = _share_frames(parts)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_view_worker,
+                                     initargs=(frames_dir, profile, ai is not None)) as pool:
+                results = list(pool.map(_state_view, states_to_process))
+        else:
+            results = [_state_view(st) for st in states_to_process]
+    finally:
+        _WORKER_STATE.clear()
+        if frames_dir:
+            shutil.rmtree(frames_dir, ignore_errors=True)
+    for st, view, secs, records in results:
+        dataset['stats'][st] = view
+        timings[st] = secs
+        prof.extend(records)
+
+    for st, secs in sorted(timings.items(), key=lambda x: -x[1]):
+        logger.info(f"  {st}: {secs:.2f}s")
+    logger.info(f"State views done in {time.time() - states_start:.2f}s "
+                f"({sum(timings.values()):.2f}s of per-state work on {workers} workers)")
+    lap("state views")
+
+    # AI insights for every recomputed view, fanned out concurrently under the
+    # AI_CONCURRENCY / AI_RATE limits (cached answers return immediately)
+    jobs = [(st, key, prompt) for st, view in dataset['stats'].items()
+            for key, prompt in view.pop('ai_prompts', {}).items()]
+    if ai and jobs:
+        ai_start = time.time()
+        answers = ai.generate_batch([prompt for _, _, prompt in jobs])
+        for (st, key, _), text in zip(jobs, answers):
+            dataset['stats'][st].setdefault('ai', {})[key] = text
+        logger.info(f"Generated {len(jobs)} AI insights in {time.time() - ai_start:.2f}s")
+    lap("ai insights")
+
+    # 5. Write JSON: a small index with the national view, one shard per
+    # recomputed state (unchanged shards are left as they are)
+    logger.info(f"Saving index and {len(dataset['stats']) - 1} state shards to {data_dir}...")
+    shard_bytes = 0
+    for st, view in dataset['stats'].items():
+        if st != 'All':
+            shard_bytes += write_json(os.path.join(BUILD_DIR, shards[st]), view)
+    dataset['metadata']['shards'] = shards
+    index_bytes = write_json(os.path.join(data_dir, "index.json"),
+                             {"metadata": dataset['metadata'], "stats": {"All": dataset['stats']['All']}})
+    logger.info(f"index.json: {index_bytes / 1024:.1f} KB, state shards: {shard_bytes / 1024:.1f} KB")
+    lap("write json")
+
+    # Drop shards of states that no longer have rows
+    states_dir = os.path.join(data_dir, "states")
+    live = {os.path.basename(p) for p in shards.values()}
+    for name in os.listdir(states_dir) if os.path.isdir(states_dir) else []:
+        if name.split('.json')[0] + '.json' not in live:
+            os.remove(os.path.join(states_dir, name))
+
+    with open(os.path.join(data_dir, BUILD_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({"version": version, "views": fingerprints,
+                   "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")}, f, indent=1)
 
     # 6. Copy Web Assets
     src_web = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
     if os.path.exists(src_web):
-        for item in os.listdir(src_web):
-            s = os.path.join(src_web, item)
-            d = os.path.join(BUILD_DIR, item)
-            if os.path.isdir(s):
-                if os.path.exists(d): shutil.rmtree(d) # Clean replace
-                shutil.copytree(s, d)
-            else:
-                shutil.copy2(s, d)
+        copied = copy_web_assets(src_web, incremental=incremental)
+        logger.info(f"Copied {copied} web assets.")
+    lap("web assets")
+
+    if profile:
+        report = os.path.join(data_dir, "build_profile")
+        prof.write_report(report, generated_at=dataset['metadata']['generated_at'],
+                          total_s=round(time.time() - start_time, 3), workers=workers, incremental=incremental)
+        logger.info(f"Build profile written to {report}.json/.csv; slowest stages:")
+        prof.log_summary()
                 
     logger.info(f"Build Finished in {time.time() - start_time:.2f}s")
     print("Build Complete.")
 
 if __name__ == "__main__":
-    build()
+    # --incremental: reuse unchanged outputs of the previous build in BUILD_DIR
+    # --profile: write a per-stage timing/memory report next to the data
+    build(incremental=True if "--incremental" in sys.argv[1:] else None,
+          profile=True if "--profile" in sys.argv[1:] else None)
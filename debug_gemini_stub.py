@@ -0,0 +1,95 @@
+import sys
+import os
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from aadhaar_analytics.utils import constants
+from aadhaar_analytics.ai.gemini_service import GeminiService, is_retryable
+
+# Checks the batch path of GeminiService against a local stub of the Gemini
+# REST API (no key or network needed): retries of 429/5xx answers, per-call
+# timeouts, and no retry of other client errors.
+
+# The prompt picks the stub's behaviour on the first attempt; later attempts succeed
+FIRST_ATTEMPT = {
+    "ok": 200,
+    "flaky-429": 429,
+    "flaky-503": 503,
+    "hang": "hang",
+    "fatal-400": 400,
+}
+# Attempts each prompt should take
+EXPECTED_ATTEMPTS = {"ok": 1, "flaky-429": 2, "flaky-503": 2, "hang": 2, "fatal-400": 1}
+
+attempts = {}
+lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = request["contents"][0]["parts"][0]["text"]
+        with lock:
+            attempts[prompt] = attempts.get(prompt, 0) + 1
+            first = attempts[prompt] == 1
+        behaviour = FIRST_ATTEMPT[prompt] if first else 200
+        if behaviour == "hang":
+            time.sleep(3)
+            behaviour = 200
+        if behaviour != 200:
+            return self.reply(behaviour, {"error": {"code": behaviour, "message": "stub error", "status": "STUB"}})
+        self.reply(200, {"candidates": [{"content": {"role": "model", "parts": [{"text": f"answer to {prompt}"}]},
+                                         "finishReason": "STOP"}]})
+
+def run_checks():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"DEBUG: Stub Gemini API at {base_url}")
+
+    # No cached answers, fast retries
+    constants.AI_CACHE_ENABLED = False
+    constants.AI_RETRIES = 2
+    constants.AI_BACKOFF = 0.05
+
+    gemini = GeminiService("stub-key", base_url=base_url, timeout=0.5)
+    prompts = list(FIRST_ATTEMPT)
+    start = time.time()
+    responses = gemini.generate_batch(prompts, concurrency=len(prompts), rate=0)
+    print(f"Batch of {len(prompts)} prompts answered in {time.time() - start:.2f}s")
+
+    failures = []
+    for prompt, response in zip(prompts, responses):
+        expected = "❌ Error" if prompt == "fatal-400" else f"answer to {prompt}"
+        status = "OK" if response.startswith(expected) and attempts.get(prompt) == EXPECTED_ATTEMPTS[prompt] else "FAIL"
+        if status == "FAIL":
+            failures.append(prompt)
+        print(f"{status:<5}{prompt:<12}attempts={attempts.get(prompt)} (expected {EXPECTED_ATTEMPTS[prompt]})  {response[:60]!r}")
+
+    server.shutdown()
+    return failures
+
+if __name__ == "__main__":
+    assert is_retryable(TimeoutError()), "transport errors should be retried"
+    assert not is_retryable(ValueError()), "programming errors should not be retried"
+    failures = run_checks()
+    if failures:
+        print(f"FAILED: {', '.join(failures)}")
+        sys.exit(1)
+    print("All stub checks passed.")
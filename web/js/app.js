@@ -2,6 +2,8 @@
 let APP_DATA = null;
 let CURRENT_STATE = "All";
 let GEO_DATA = null;
+// In-flight shard requests, keyed by state
+const SHARD_REQUESTS = {};
 
 // Debug Helper
 function log(msg) {
@@ -44,16 +46,18 @@ document.addEventListener('DOMContentLoaded', async () => {
 
     try {
         log("Fetching data...");
+        // Index only (metadata + national view); state shards are fetched on selection
         const [resData, resGeo] = await Promise.all([
-            fetch('data.json'),
+            fetch('data/index.json'),
             fetch('assets/india_states.geojson').catch(() => ({ ok: false })) // Soft fail for Geo
         ]);
 
         if (!resData.ok) {
-            log("Data.json load failed!");
+            log("index.json load failed!");
             throw new Error("Data load failed");
         }
         APP_DATA = await resData.json();
+        decodeStats(APP_DATA.stats.All);
         log("Data loaded. States: " + (APP_DATA.metadata?.states?.length || 0));
 
         if (resGeo.ok) {
@@ -103,10 +107,66 @@ function setupNavigation() {
         });
     });
 
-    document.getElementById('state-filter').addEventListener('change', (e) => {
-        CURRENT_STATE = e.target.value;
-        renderDashboard();
+    document.getElementById('state-filter').addEventListener('change', async (e) => {
+        const state = e.target.value;
+        CURRENT_STATE = state;
+        await loadStateStats(state);
+        // Skip the render if another state was picked while this shard loaded
+        if (CURRENT_STATE === state) renderDashboard();
+    });
+}
+
+// Fetches a state's shard into APP_DATA.stats (once; concurrent calls share the request)
+function loadStateStats(state) {
+    if (!APP_DATA || APP_DATA.stats[state]) return Promise.resolve();
+    const url = APP_DATA.metadata?.shards?.[state];
+    if (!url) return Promise.resolve();
+    if (!SHARD_REQUESTS[state]) {
+        log(`Fetching shard: ${state}`);
+        SHARD_REQUESTS[state] = fetch(url)
+            .then(res => {
+                if (!res.ok) throw new Error(`Shard load failed (${res.status})`);
+                return res.json();
+            })
+            .then(stats => { APP_DATA.stats[state] = decodeStats(stats); })
+            .catch(e => { log(`Error: ${e.message}`); })
+            .finally(() => { delete SHARD_REQUESTS[state]; });
+    }
+    return SHARD_REQUESTS[state];
+}
+
+// Columnar tables (build_web.encode_table) -> arrays of row objects, in place
+function decodeStats(stats) {
+    if (!stats) return stats;
+    Object.keys(stats).forEach(k => {
+        const v = stats[k];
+        if (v && typeof v === 'object' && v.columns && typeof v.n === 'number') stats[k] = decodeTable(v);
     });
+    return stats;
+}
+
+function decodeTable(table) {
+    const names = Object.keys(table.columns);
+    const cols = names.map(name => decodeColumn(table.columns[name]));
+    const rows = new Array(table.n);
+    for (let i = 0; i < table.n; i++) {
+        const row = {};
+        for (let j = 0; j < names.length; j++) row[names[j]] = cols[j][i];
+        rows[i] = row;
+    }
+    return rows;
+}
+
+function decodeColumn(col) {
+    if (Array.isArray(col)) return col;
+    // Dictionary-encoded names (-1 = missing)
+    if (col.dict) return col.codes.map(c => (c < 0 ? null : col.dict[c]));
+    // Day offsets from an epoch date -> "YYYY-MM-DD"
+    if (col.days) {
+        const epoch = Date.parse(col.epoch);
+        return col.days.map(d => new Date(epoch + d * 86400000).toISOString().slice(0, 10));
+    }
+    return [];
 }
 
 function populateFilters() {